@@ -1,6 +1,14 @@
 import axios from "axios";
 import FormData from "form-data";
 
+const ANALYSIS_URL = "http://localhost:5000";
+const POLL_INTERVAL_MS = 1000;
+const JOB_TIMEOUT_MS = 30 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Submits the project as a background job and polls until the analysis
+// finishes, so long analyses don't hold one request open past proxy timeouts.
 async function getCodeSmellData(zipFile) {
   const formData = new FormData();
 
@@ -9,9 +17,25 @@ async function getCodeSmellData(zipFile) {
     contentType: zipFile.mimetype,
   });
 
-  const response = await axios.post("http://localhost:5000/upload", formData, {
+  const { data: job } = await axios.post(`${ANALYSIS_URL}/jobs`, formData, {
     headers: formData.getHeaders(),
   });
+
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  let status = job;
+  while (status.status !== "done" && status.status !== "failed") {
+    if (Date.now() > deadline) {
+      throw new Error(`Code smell analysis timed out (job ${job.jobId})`);
+    }
+    await sleep(POLL_INTERVAL_MS);
+    ({ data: status } = await axios.get(`${ANALYSIS_URL}/jobs/${job.jobId}`));
+  }
+
+  if (status.status === "failed") {
+    throw new Error(`Code smell analysis failed: ${status.error}`);
+  }
+
+  const response = await axios.get(`${ANALYSIS_URL}/jobs/${job.jobId}/result`);
   console.log("Code Smell Response:", response.data);
 
   return response?.data?.codeSmells;
@@ -1,10 +1,26 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import io
+import json
+import tempfile
+import threading
 import zipfile
 import logging
 import os
-from smell_detector import traverse_zip
+import time
+import smell_detector
+from smell_detector import iter_traverse_zip, traverse_zip
+import metrics
+from metrics import REQUESTS, REQUEST_SECONDS
+from jobs import DONE, FAILED, JobFailed, JobQueueFull, JobRunner, JobStore
+from config import (
+    UPLOAD_SPOOL_MAX_BYTES,
+    UPLOAD_TMP_DIR,
+    JOB_WORKERS,
+    JOB_MAX_PENDING,
+    JOB_DIR,
+    JOB_RETENTION_SECONDS,
+)
 
 # Configure logging for production
 FLASK_ENV = os.getenv("FLASK_ENV", "development")
@@ -15,64 +31,136 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class UploadRequest(Request):
+    """Request that streams large file uploads straight to a temp file on disk"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_MAX_BYTES:
+            return io.BytesIO()
+        # Named so the archive can be reopened by path (e.g. by worker processes)
+        return tempfile.NamedTemporaryFile("wb+", suffix=".zip", dir=UPLOAD_TMP_DIR)
+
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or "unknown"
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if "request_start" in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
+
 # Health check endpoint
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "ok"}), 200
 
-@app.route("/upload", methods=["POST"])
-def upload_project():
-    logger.debug("Received upload request")
-    
+# Readiness check endpoint (models loaded and warmed up)
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness for the load balancer: 200 once the models are loaded and
+    warmed up and the inference threads and job runner are available,
+    503 before that. /health only says the process is up.
+    """
+    # Also starts the warm-up and job runner when the app was not started
+    # through __main__ (e.g. under a WSGI server)
+    smell_detector.start_warm_up()
+    runner = get_job_runner()
+
+    state = smell_detector.readiness()
+    state["jobs"] = {"workers": JOB_WORKERS, "pending": runner.store.pending_count()}
+    state["status"] = "ready" if state["ready"] else "starting"
+    if state["warmUp"]["status"] == "failed":
+        state["status"] = "failed"
+    return jsonify(state), 200 if state["ready"] else 503
+
+# Prometheus-style metrics in the text exposition format
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+def get_uploaded_zip():
+    """The uploaded ZIP file, or (None, error response) if the upload is invalid"""
     if "file" not in request.files:
         logger.error("No file uploaded in request")
-        return jsonify({"error": "No file uploaded"}), 400
+        return None, (jsonify({"error": "No file uploaded"}), 400)
 
     file = request.files["file"]
     if not file.filename:
         logger.error("Empty filename received")
-        return jsonify({"error": "Invalid filename"}), 400
+        return None, (jsonify({"error": "Invalid filename"}), 400)
         
     if not file.filename.endswith(".zip"):
         logger.error("Uploaded file is not a ZIP file: %s", file.filename)
-        return jsonify({"error": "File must be a ZIP file"}), 400
+        return None, (jsonify({"error": "File must be a ZIP file"}), 400)
+
+    return file, None
+
+def format_smells(filepath, smells):
+    """Smells of one file in the response structure"""
+    filename = filepath.split("/")[-1]
+    return [{
+        "fileName": filename,
+        "filePath": filepath,
+        "startLine": smell["startline"],
+        "endLine": smell["endline"],
+        "smellType": smell["codeSmellType"],
+        "code": smell["code"],
+        "category": smell["category"],
+        "weight": smell["weight"]
+    } for smell in smells]
+
+def format_results(detected_smells, tables=None):
+    """
+    Response body for the smells found by traverse_zip, with the metrics
+    table of every parsed file when tables were collected
+    """
+    results = []
+    for filepath, smells in detected_smells.items():
+        results.extend(format_smells(filepath, smells))
+    response = {"total_smells": len(results), "codeSmells": results}
+    if tables is not None:
+        response["metrics"] = {filepath: table for filepath, table in tables.items() if table is not None}
+    return response
+
+def wants_metrics():
+    """Whether the caller asked for the raw method and type metrics (?metrics=true)"""
+    return request.args.get("metrics", "").lower() in ("1", "true", "yes")
+
+@app.route("/upload", methods=["POST"])
+def upload_project():
+    logger.debug("Received upload request")
+
+    file, error = get_uploaded_zip()
+    if error:
+        return error
 
     try:
-        # Read ZIP file in memory
+        # The upload is already spooled (memory or temp file); open the ZIP
+        # from there. CRCs are verified as each analyzed entry is read, so
+        # a corrupted member raises BadZipFile without a separate pass.
         logger.debug("Reading ZIP file: %s", file.filename)
-        zip_data = io.BytesIO(file.read())
-        
-        # Verify ZIP file integrity
-        with zipfile.ZipFile(zip_data, 'r') as zip_ref:
-            if zip_ref.testzip() is not None:
-                logger.error("ZIP file is corrupted")
-                return jsonify({"error": "ZIP file is corrupted"}), 400
-            logger.debug("ZIP file is valid, starting smell detection")
+        zip_data = file.stream
+        zip_data.seek(0)
         
         # Analyze smells in the ZIP file
-        detected_smells = traverse_zip(zip_data)
+        tables = {} if wants_metrics() else None
+        detected_smells = traverse_zip(zip_data, tables=tables)
         
         # Format results to match requested structure
-        results = []
-        for filepath, smells in detected_smells.items():
-            filename = filepath.split("/")[-1]
-            for smell in smells:
-                results.append({
-                    "fileName": filename,
-                    "filePath": filepath,
-                    "startLine": smell["startline"],
-                    "endLine": smell["endline"],
-                    "smellType": smell["codeSmellType"],
-                    "code": smell["code"],
-                    "category": smell["category"],
-                    "weight": smell["weight"]
-                })
+        response = format_results(detected_smells, tables)
         
-        logger.debug("Smell detection completed, returning %d smells", len(results))
-        return jsonify({"total_smells": len(results), "codeSmells": results}), 200
+        logger.debug("Smell detection completed, returning %d smells", response["total_smells"])
+        return jsonify(response), 200
     
     except zipfile.BadZipFile as e:
         logger.error("Invalid ZIP file: %s", str(e))
@@ -84,6 +172,148 @@ def upload_project():
         else:
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+def stream_results(zip_data, with_metrics=False):
+    """
+    NDJSON lines: one per analyzed file as it finishes (with its metrics
+    table if asked for), then a summary
+    """
+    total_files = 0
+    total_smells = 0
+    tables = {} if with_metrics else None
+    try:
+        for _, filepath, smells in iter_traverse_zip(zip_data, tables=tables):
+            smells = smells or []
+            total_files += 1
+            total_smells += len(smells)
+            line = {"type": "file", "filePath": filepath, "codeSmells": format_smells(filepath, smells)}
+            if tables is not None:
+                line["metrics"] = tables.pop(filepath, None)
+            yield json.dumps(line) + "\n"
+    except zipfile.BadZipFile as e:
+        # Headers are already sent; report the error in-band and stop
+        logger.error("Invalid ZIP file: %s", str(e))
+        yield json.dumps({"type": "error", "error": "Invalid or corrupted ZIP file"}) + "\n"
+        return
+    except Exception as e:
+        logger.error("Error during smell detection: %s", str(e), exc_info=True)
+        message = "Internal server error" if FLASK_ENV == "production" else f"Internal server error: {str(e)}"
+        yield json.dumps({"type": "error", "error": message}) + "\n"
+        return
+    logger.debug("Streamed %d smells from %d files", total_smells, total_files)
+    yield json.dumps({"type": "summary", "total_files": total_files, "total_smells": total_smells}) + "\n"
+
+@app.route("/upload/stream", methods=["POST"])
+def upload_project_stream():
+    logger.debug("Received streaming upload request")
+
+    file, error = get_uploaded_zip()
+    if error:
+        return error
+
+    zip_data = file.stream
+    zip_data.seek(0)
+    if not zipfile.is_zipfile(zip_data):
+        logger.error("Invalid ZIP file: %s", file.filename)
+        return jsonify({"error": "Invalid or corrupted ZIP file"}), 400
+    zip_data.seek(0)
+
+    # stream_with_context keeps the request (and its spooled upload) alive
+    # until the last line is sent; X-Accel-Buffering stops nginx from
+    # buffering the whole response
+    return Response(
+        stream_with_context(stream_results(zip_data, wants_metrics())),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+def run_analysis_job(archive_path, progress):
+    try:
+        return format_results(traverse_zip(archive_path, progress=progress))
+    except zipfile.BadZipFile as e:
+        logger.error("Invalid ZIP file: %s", str(e))
+        raise JobFailed("Invalid or corrupted ZIP file")
+
+def get_job_runner():
+    """Job runner, created on first use; resumes jobs left by a previous process"""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(
+                JobStore(os.path.join(JOB_DIR, "jobs.sqlite3")),
+                os.path.join(JOB_DIR, "archives"),
+                run_analysis_job,
+                workers=JOB_WORKERS,
+                max_pending=JOB_MAX_PENDING,
+                retention_seconds=JOB_RETENTION_SECONDS,
+            )
+            _job_runner.start()
+        return _job_runner
+
+def job_status(job):
+    return {
+        "jobId": job["id"],
+        "status": job["status"],
+        "fileName": job["filename"],
+        "createdAt": job["created_at"],
+        "startedAt": job["started_at"],
+        "finishedAt": job["finished_at"],
+        "progress": {
+            "filesDone": job["files_done"],
+            "filesTotal": job["files_total"],
+        },
+        "error": job["error"],
+    }
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    logger.debug("Received job request")
+
+    file, error = get_uploaded_zip()
+    if error:
+        return error
+
+    file.stream.seek(0)
+    if not zipfile.is_zipfile(file.stream):
+        logger.error("Invalid ZIP file: %s", file.filename)
+        return jsonify({"error": "Invalid or corrupted ZIP file"}), 400
+    file.stream.seek(0)
+
+    runner = get_job_runner()
+    try:
+        job_id = runner.submit(file.filename, file.stream)
+    except JobQueueFull as e:
+        logger.warning("Rejecting job: %s", e)
+        return jsonify({"error": "Too many analyses in progress, try again later"}), 503, {"Retry-After": "30"}
+
+    logger.debug("Queued job %s for %s", job_id, file.filename)
+    return jsonify(job_status(runner.store.get(job_id))), 202, {"Location": f"/jobs/{job_id}"}
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_status(job)), 200
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    store = get_job_runner().store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == FAILED:
+        return jsonify({"error": job["error"]}), 500
+    if job["status"] != DONE:
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+    return jsonify(store.result(job_id)), 200
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -96,4 +326,11 @@ def server_error(error):
 if __name__ == "__main__":
     debug_mode = FLASK_ENV != "production"
     logger.info(f"Starting Flask application (debug={debug_mode})")
+    # Resume pending jobs at startup (only in the serving process when the
+    # debug reloader is active)
+    if not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_job_runner()
+        # Load and warm the models in the background (here, or in every
+        # analysis worker); /ready reports 503 until it is done
+        smell_detector.start_warm_up()
     app.run(debug=debug_mode, port=5000, host="127.0.0.1")
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Dispatch Benchmark
+
+Compares the original node x detector loop in analyze_code with the
+type-indexed dispatch table over the same parsed files.
+
+Usage:
+    python benchmarks/bench_dispatch.py [path/to/project.zip | path/to/dir] [--repeat N]
+
+Without a path a synthetic set of Java classes is analyzed.
+"""
+
+import argparse
+import os
+import sys
+import time
+import zipfile
+
+import javalang
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smell_detector import RULE_DETECTORS  # noqa: E402
+from detectors.registry import DispatchTable, walk_nodes  # noqa: E402
+
+
+def synthetic_sources(class_count=200, methods_per_class=12):
+    """Generate simple but branchy Java classes"""
+    sources = []
+    for c in range(class_count):
+        lines = [f"package bench.p{c % 10};", "", f"public class Bench{c} {{"]
+        for f in range(8):
+            lines.append(f"    private int field{f};")
+        for m in range(methods_per_class):
+            lines.extend([
+                f"    public int method{m}(int a, int b, String s) {{",
+                "        int total = 0;",
+                "        for (int i = 0; i < a; i++) {",
+                "            if (s.equals(\"x\") && b > i) {",
+                "                total += i;",
+                "            } else if (b < 0 || a > 10) {",
+                "                total -= b;",
+                "            }",
+                "        }",
+                "        switch (a) { case 1: total++; break; case 2: total--; break; default: break; }",
+                "        try { total = Integer.parseInt(s); } catch (NumberFormatException e) { e = null; }",
+                "        return total > 0 ? total : -total;",
+                "    }",
+            ])
+        lines.append("}")
+        sources.append((f"src/Bench{c}.java", "\n".join(lines)))
+    return sources
+
+
+def load_sources(path):
+    sources = []
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zip_ref:
+            for name in zip_ref.namelist():
+                if name.endswith('.java'):
+                    sources.append((name, zip_ref.read(name).decode('utf-8', errors='ignore')))
+    else:
+        for root, _, files in os.walk(path):
+            for name in files:
+                if name.endswith('.java'):
+                    full_path = os.path.join(root, name)
+                    with open(full_path, encoding='utf-8', errors='ignore') as handle:
+                        sources.append((full_path, handle.read()))
+    return sources
+
+
+def parse_all(sources):
+    parsed = []
+    for filepath, content in sources:
+        try:
+            tree = javalang.parse.parse(content)
+        except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+            continue
+        parsed.append((filepath, content.splitlines(), tree))
+    return parsed
+
+
+def run_loop(parsed):
+    """The original analyze_code loop: every detector on every node"""
+    smells = []
+    for filepath, source_lines, tree in parsed:
+        filename = filepath.split('/')[-1]
+        for path, node in javalang.ast.walk_tree(tree):
+            for detector in RULE_DETECTORS:
+                result = detector(node, source_lines, filepath, filename)
+                if result:
+                    smells.extend(result if isinstance(result, list) else [result])
+    return smells
+
+
+def run_dispatch(parsed, table):
+    smells = []
+    for filepath, source_lines, tree in parsed:
+        filename = filepath.split('/')[-1]
+        for node in walk_nodes(tree):
+            for detector in table.handlers_for(type(node)):
+                result = detector(node, source_lines, filepath, filename)
+                if result:
+                    smells.extend(result if isinstance(result, list) else [result])
+    return smells
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='Project zip or directory of .java files')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sources = load_sources(args.path) if args.path else synthetic_sources()
+    parsed = parse_all(sources)
+    node_count = sum(1 for _, _, tree in parsed for _ in walk_nodes(tree))
+
+    start = time.perf_counter()
+    table = DispatchTable(RULE_DETECTORS)
+    build_time = time.perf_counter() - start
+
+    loop_time, loop_smells = best_of(lambda: run_loop(parsed), args.repeat)
+    dispatch_time, dispatch_smells = best_of(lambda: run_dispatch(parsed, table), args.repeat)
+
+    print(f"files: {len(parsed)}  nodes: {node_count}  detectors: {len(RULE_DETECTORS)}")
+    print(f"table build:   {build_time * 1000:8.2f} ms")
+    print(f"detector loop: {loop_time * 1000:8.2f} ms")
+    print(f"dispatch:      {dispatch_time * 1000:8.2f} ms  ({loop_time / dispatch_time:.1f}x)")
+
+    if loop_smells != dispatch_smells:
+        print("MISMATCH: dispatch output differs from the detector loop")
+        sys.exit(1)
+    print(f"smells: {len(dispatch_smells)} (identical)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Inference Backend Comparison
+
+Runs the Complex Method and Feature Envy classifiers on the same snippets
+with each inference backend and reports how far the predictions drift from
+the fp32 PyTorch reference, and how fast each backend is.
+
+Usage:
+    python benchmarks/compare_backends.py [held-out.zip | dir] [--backends pytorch,quantized,onnx]
+                                          [--profile small|medium|large] [--limit N]
+
+Without a path the synthetic corpus (see corpus.py) is used; for accuracy
+numbers that mean something, pass a held-out project that was not used
+for training. The onnx backend is skipped when onnxruntime is missing.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import javalang  # noqa: E402
+
+import corpus  # noqa: E402
+from config import ONNX_EXPORT_DIR  # noqa: E402
+from detectors.context import FileContext  # noqa: E402
+from detectors.semantics import backends, inference, models  # noqa: E402
+from detectors.semantics.feature_envy_preprocessor import preprocess_java_file  # noqa: E402
+from result_cache import directory_version, fingerprint  # noqa: E402
+
+# (model directory, tokenizer directory) as loaded by the detectors
+MODELS = {
+    'complex_method': ('complex-method', 'feature-envy'),
+    'feature_envy': ('feature-envy', 'feature-envy'),
+}
+
+
+def load_sources(path):
+    if path is None:
+        return None
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zip_ref:
+            return [(name, zip_ref.read(name).decode('utf-8', errors='ignore'))
+                    for name in zip_ref.namelist() if name.endswith('.java')]
+    sources = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.java'):
+                full_path = os.path.join(root, name)
+                with open(full_path, encoding='utf-8', errors='ignore') as handle:
+                    sources.append((full_path, handle.read()))
+    return sources
+
+
+def extract_snippets(sources):
+    """Complex Method snippets and Feature Envy samples, as the detectors build them"""
+    snippets = {'complex_method': [], 'feature_envy': []}
+    for filepath, content in sources:
+        try:
+            context = FileContext(content, filepath)
+        except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+            continue
+        for _, method in context.tree.filter(javalang.tree.MethodDeclaration):
+            if method.position and method.name != 'main':
+                start_line = method.position.line
+                end_line = context.spans.end_line(method)
+                snippets['complex_method'].append('\n'.join(context.source_lines[start_line - 1:end_line]))
+        for sample in preprocess_java_file(content, filepath, context.filename, context):
+            if sample.get('code_sample'):
+                snippets['feature_envy'].append(sample['code_sample'])
+    return snippets
+
+
+def run_backend(name, backend, texts, tokenizer, batch_size, max_tokens):
+    model_dir, tokenizer_dir = (os.path.join(PROJECT_ROOT, d) for d in MODELS[name])
+    model_id = fingerprint(directory_version(model_dir), directory_version(tokenizer_dir))
+
+    start = time.perf_counter()
+    model, device = backends.load_classifier(model_dir, backend, ONNX_EXPORT_DIR, model_id)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels, logits = inference.classify(name, tokenizer, model, device, texts, batch_size, max_tokens)
+    return labels, logits, load_time, time.perf_counter() - start
+
+
+def compare(reference, candidate):
+    ref_labels, ref_logits = reference
+    labels, logits = candidate
+    agree = sum(1 for a, b in zip(ref_labels, labels) if a == b)
+    gained = sum(1 for a, b in zip(ref_labels, labels) if a == 0 and b == 1)
+    lost = sum(1 for a, b in zip(ref_labels, labels) if a == 1 and b == 0)
+    diffs = [abs(x - y) for ref_row, row in zip(ref_logits, logits) for x, y in zip(ref_row, row)]
+    return {
+        'agreement': agree / len(ref_labels) if ref_labels else 1.0,
+        'gained': gained,
+        'lost': lost,
+        'max_logit_diff': max(diffs) if diffs else 0.0,
+        'mean_logit_diff': sum(diffs) / len(diffs) if diffs else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='Held-out project zip or directory of .java files')
+    parser.add_argument('--profile', choices=sorted(corpus.PROFILES), default='small')
+    parser.add_argument('--backends', default=','.join(backends.BACKENDS))
+    parser.add_argument('--limit', type=int, default=0, help='At most this many snippets per model')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-tokens', type=int, default=8192)
+    args = parser.parse_args()
+
+    selected = [b.strip() for b in args.backends.split(',') if b.strip()]
+    if 'onnx' in selected:
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            print("onnxruntime is not installed, skipping the onnx backend")
+            selected.remove('onnx')
+    # pytorch is the reference everything is compared against
+    selected = ['pytorch'] + [b for b in selected if b != 'pytorch']
+
+    sources = load_sources(args.path)
+    if sources is None:
+        with zipfile.ZipFile(io.BytesIO(corpus.project_zip(args.profile))) as zip_ref:
+            sources = [(name, zip_ref.read(name).decode('utf-8')) for name in zip_ref.namelist()]
+    snippets = extract_snippets(sources)
+
+    tokenizer = models.get_tokenizer(os.path.join(PROJECT_ROOT, 'feature-envy'))
+
+    failed = False
+    for name, texts in snippets.items():
+        texts = [inference.normalize_text(text) for text in texts]
+        if args.limit:
+            texts = texts[:args.limit]
+        if not texts:
+            continue
+        print(f"\n{name}: {len(texts)} snippets")
+        print(f"  {'backend':<10} {'load s':>8} {'ms/snip':>8} {'speedup':>8} {'agree':>8} "
+              f"{'gained':>6} {'lost':>5} {'max dlogit':>11} {'mean dlogit':>12}")
+
+        reference = None
+        for backend in selected:
+            try:
+                labels, logits, load_time, elapsed = run_backend(
+                    name, backend, texts, tokenizer, args.batch_size, args.max_tokens)
+            except Exception as e:
+                print(f"  {backend:<10} failed: {e}")
+                failed = True
+                continue
+            if reference is None:
+                reference = (labels, logits, elapsed)
+            drift = compare(reference[:2], (labels, logits))
+            print(f"  {backend:<10} {load_time:8.2f} {elapsed / len(texts) * 1000:8.2f} "
+                  f"{reference[2] / elapsed:7.2f}x {drift['agreement']:8.2%} "
+                  f"{drift['gained']:6d} {drift['lost']:5d} "
+                  f"{drift['max_logit_diff']:11.4f} {drift['mean_logit_diff']:12.5f}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
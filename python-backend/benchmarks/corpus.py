@@ -0,0 +1,418 @@
+"""
+Synthetic Java Corpus
+
+Deterministic generator of Java projects for benchmarks and golden-output
+regression runs. The same profile and seed always produce byte-identical
+archives, so timings and smell lists are comparable across commits.
+
+A project mixes:
+- many small entity classes (fields, getters/setters, a few rule triggers)
+- a few giant classes with many long methods
+- methods with deeply nested ifs and large switches
+- service classes that mostly call methods of other classes (feature envy)
+- grid classes with nested classic and enhanced for loops writing their
+  loop variables, and locals that are declared but never read
+- a test directory, a JavaFX file and vendored duplicates, which the
+  analyzer skips or deduplicates
+
+Usage:
+    python benchmarks/corpus.py out.zip [--profile small|medium|large] [--seed N]
+"""
+
+import argparse
+import io
+import random
+import zipfile
+
+# Shape of each project size
+PROFILES = {
+    'small': dict(entities=40, giants=2, giant_methods=40, services=8,
+                  nesting_depth=6, switch_cases=16, duplicates=3, grids=4),
+    'medium': dict(entities=250, giants=5, giant_methods=80, services=40,
+                   nesting_depth=8, switch_cases=32, duplicates=10, grids=20),
+    'large': dict(entities=1200, giants=12, giant_methods=150, services=200,
+                  nesting_depth=10, switch_cases=64, duplicates=40, grids=80),
+}
+
+# Fixed timestamp so archives are byte-identical between runs
+ZIP_DATE_TIME = (2024, 1, 1, 0, 0, 0)
+
+FIELD_TYPES = ['int', 'long', 'String', 'double', 'boolean']
+
+
+def _capitalize(name):
+    return name[0].upper() + name[1:]
+
+
+def _default(field_type):
+    return {'int': '0', 'long': '0L', 'String': '""', 'double': '0.0', 'boolean': 'false'}[field_type]
+
+
+def entity_class(rng, package, name):
+    """Small POJO with accessors and one or two best-practice violations"""
+    field_count = rng.randint(3, 18)
+    fields = [(rng.choice(FIELD_TYPES), f"field{i}") for i in range(field_count)]
+
+    lines = [f"package {package};", ""]
+    if rng.random() < 0.3:
+        lines += ["import java.sql.ResultSet;", "import java.sql.SQLException;", ""]
+    lines.append(f"public class {name} {{")
+    lines += [f"    private {t} {f};" for t, f in fields]
+    lines.append("")
+    for t, f in fields:
+        lines += [
+            f"    public {t} get{_capitalize(f)}() {{",
+            f"        return {f};",
+            "    }",
+            "",
+            f"    public void set{_capitalize(f)}({t} {f}) {{",
+            f"        this.{f} = {f};",
+            "    }",
+            "",
+        ]
+
+    numeric = [f for t, f in fields if t in ('int', 'long', 'double')]
+    strings = [f for t, f in fields if t == 'String']
+
+    if numeric:
+        f = rng.choice(numeric)
+        lines += [
+            "    public long total(int count) {",
+            "        long sum = 0;",
+            "        for (int i = 0; i < count; i++) {",
+            f"            sum += {f} * i;",
+        ]
+        if rng.random() < 0.4:
+            lines.append("            i += 1;")
+        lines += ["        }", "        return sum;", "    }", ""]
+
+    if strings:
+        f = rng.choice(strings)
+        comparison = f'{f}.equals("none")' if rng.random() < 0.5 else f'"none".equals({f})'
+        lines += [
+            "    public boolean isEmpty() {",
+            f"        return {f} == null || {comparison};",
+            "    }",
+            "",
+        ]
+
+    if rng.random() < 0.3:
+        lines += [
+            "    public void normalize(String value) {",
+            "        value = value.trim();",
+            "        try {",
+            "            Integer.parseInt(value);",
+            "        } catch (NumberFormatException e) {",
+            "            e = null;",
+            "        }",
+            "    }",
+            "",
+        ]
+
+    if lines[2].startswith("import java.sql"):
+        lines += [
+            "    public int load(ResultSet rs) throws SQLException {",
+            "        if (rs.next()) {",
+            "            return rs.getInt(1);",
+            "        }",
+            "        return -1;",
+            "    }",
+            "",
+        ]
+
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def nested_method(rng, name, depth):
+    """Method whose ifs nest `depth` levels deep, with && / || branches"""
+    lines = [f"    public int {name}(int a, int b, int c) {{", "        int result = 0;"]
+    indent = "        "
+    for level in range(depth):
+        op = rng.choice(['&&', '||'])
+        lines.append(f"{indent}if (a > {level} {op} b < {level * 3}) {{")
+        indent += "    "
+        lines.append(f"{indent}result += {level};")
+    for level in reversed(range(depth)):
+        indent = indent[:-4]
+        lines.append(f"{indent}}} else {{")
+        lines.append(f"{indent}    result -= c;")
+        lines.append(f"{indent}}}")
+    lines += ["        return result;", "    }", ""]
+    return lines
+
+
+def switch_method(rng, name, cases):
+    lines = [f"    public String {name}(int code) {{", "        String label;", "        switch (code) {"]
+    for case in range(cases):
+        lines += [f"            case {case}:", f'                label = "L{case}_{rng.randint(0, 999)}";', "                break;"]
+    lines += ["            default:", '                label = "unknown";', "        }", "        return label;", "    }", ""]
+    return lines
+
+
+def straight_method(rng, name, statements):
+    lines = [f"    public double {name}(double x, double y) {{", "        double acc = x;"]
+    for s in range(statements):
+        op = rng.choice(['+', '-', '*'])
+        lines.append(f"        acc = acc {op} (y + {s}) / {rng.randint(2, 9)};")
+        if s % 5 == 4:
+            lines.append(f'        logger.debug("step " + {s} + " acc=" + acc);')
+    lines += ["        return acc;", "    }", ""]
+    return lines
+
+
+def giant_class(rng, package, name, method_count, nesting_depth, switch_cases):
+    """Hundreds to thousands of lines: many fields, long methods, deep nesting and big switches"""
+    lines = [
+        f"package {package};",
+        "",
+        "import java.util.logging.Logger;",
+        "",
+        f"public class {name} {{",
+        f"    private static final Logger logger = Logger.getLogger({name}.class.getName());",
+    ]
+    lines += [f"    private int state{i};" for i in range(20)]
+    lines.append("")
+    for m in range(method_count):
+        kind = m % 3
+        if kind == 0:
+            lines += nested_method(rng, f"decide{m}", rng.randint(2, nesting_depth))
+        elif kind == 1:
+            lines += switch_method(rng, f"label{m}", rng.randint(switch_cases // 4, switch_cases))
+        else:
+            lines += straight_method(rng, f"compute{m}", rng.randint(5, 40))
+    lines += [
+        "    public void fail(String reason) {",
+        "        try {",
+        "            validate(reason);",
+        "        } catch (Exception e) {",
+        "            throw new RuntimeException(reason, e);",
+        "        }",
+        "    }",
+        "",
+        "    private void validate(String reason) {",
+        "        if (reason == null) {",
+        "            throw new NullPointerException();",
+        "        }",
+        "    }",
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def service_class(rng, package, name, entities):
+    """Service whose methods mostly use another class's accessors (feature envy)"""
+    targets = rng.sample(entities, min(3, len(entities)))
+    lines = [f"package {package};", ""]
+    lines += [f"import {entity_package}.{entity_name};" for entity_package, entity_name, _ in targets]
+    lines += ["", f"public class {name} {{", "    private int calls;", ""]
+    for index, (_, entity_name, fields) in enumerate(targets):
+        var = entity_name[0].lower() + entity_name[1:]
+        lines.append(f"    public String describe{index}({entity_name} {var}) {{")
+        lines.append("        calls++;")
+        lines.append("        StringBuilder out = new StringBuilder();")
+        for _, f in fields[:8]:
+            lines.append(f"        out.append({var}.get{_capitalize(f)}());")
+        for t, f in fields[:4]:
+            lines.append(f"        {var}.set{_capitalize(f)}({_default(t)});")
+        lines += ["        return out.toString();", "    }", ""]
+    lines.append("    public static int helper(int a) { return a * 2; }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def matrix_method(rng, name, depth):
+    """Classic for loops nested `depth` deep; inner bodies may write outer counters"""
+    counters = [f"i{level}" for level in range(depth)]
+    lines = [f"    public long {name}(int[][] cells, int n) {{", "        long total = 0;"]
+    indent = "        "
+    for counter in counters:
+        lines.append(f"{indent}for (int {counter} = 0; {counter} < n; {counter}++) {{")
+        indent += "    "
+    lines.append(f"{indent}total += cells[{counters[0]}][{counters[-1]}];")
+    for counter in rng.sample(counters, rng.randint(0, depth)):
+        lines.append(f"{indent}{rng.choice([counter + '++', counter + ' += 2', '--' + counter])};")
+    if rng.random() < 0.5:
+        lines += [
+            f"{indent}for (int cell : cells[{counters[-1]}]) {{",
+            f"{indent}    cell *= 2;",
+            f"{indent}    {counters[0]} = cell;",
+            f"{indent}}}",
+        ]
+    for _ in counters:
+        indent = indent[:-4]
+        lines.append(f"{indent}}}")
+    lines += ["        return total;", "    }", ""]
+    return lines
+
+
+def foreach_method(rng, name, depth):
+    """Enhanced for loops nested `depth` deep, reassigning their variables"""
+    variables = [f"item{level}" for level in range(depth)]
+    lines = [f"    public String {name}(java.util.List<String> names) {{",
+             "        StringBuilder out = new StringBuilder();"]
+    indent = "        "
+    for variable in variables:
+        lines.append(f"{indent}for (String {variable} : names) {{")
+        indent += "    "
+        if rng.random() < 0.5:
+            lines.append(f"{indent}{variable} = {variable}.trim();")
+    lines.append(f"{indent}out.append({variables[-1]});")
+    for variable in rng.sample(variables, rng.randint(0, depth)):
+        lines.append(f"{indent}{variable} = out.toString();")
+    for _ in variables:
+        indent = indent[:-4]
+        lines.append(f"{indent}}}")
+    lines += ["        return out.toString();", "    }", ""]
+    return lines
+
+
+def counter_method(rng, name):
+    """Counters declared before the loop or in its header, written in the body"""
+    step = rng.randint(1, 4)
+    return [
+        f"    public int {name}(int n) {{",
+        "        int i;",
+        "        int j;",
+        "        int steps = 0;",
+        "        for (i = 0, j = n; i < j; i++, j--) {",
+        f"            i += {step};",
+        "            steps++;",
+        "        }",
+        "        for (int k = n; k > 0; k--) {",
+        f"            k -= {step};",
+        "            for (int m = 0; m < k; m++) {",
+        "                steps += m;",
+        "                k--;",
+        "            }",
+        "        }",
+        "        return steps;",
+        "    }",
+        "",
+    ]
+
+
+def locals_method(rng, name):
+    """
+    Locals that are never read: written only, in a nested block, in a lambda
+    or a loop body; "unused" has a prefix the detector ignores
+    """
+    lines = [
+        f"    public int {name}(int n) {{",
+        "        int unused = n * 2;",
+        "        int written = 0;",
+        "        written = n;",
+        "        int used = n + 1;",
+        "        {",
+        "            int inner = used;",
+        "        }",
+        "        Runnable task = () -> {",
+        "            int captured = used;",
+        "        };",
+    ]
+    if rng.random() < 0.5:
+        lines += [
+            "        for (int index = 0; index < n; index++) {",
+            "            int square = index * index;",
+            "        }",
+        ]
+    lines += ["        return used;", "    }", ""]
+    return lines
+
+
+def grid_class(rng, package, name, nesting_depth):
+    """Loop-heavy class: nested for loops writing loop variables, unread locals"""
+    depth = min(nesting_depth, 5)
+    lines = [f"package {package};", "", f"public class {name} {{", ""]
+    lines += matrix_method(rng, "sum", rng.randint(2, depth))
+    lines += foreach_method(rng, "join", rng.randint(1, depth))
+    lines += counter_method(rng, "count")
+    lines += locals_method(rng, "scratch")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_project(profile='small', seed=0):
+    """List of (archive path, source) for a profile, identical for the same seed"""
+    shape = PROFILES[profile]
+    rng = random.Random(seed)
+    files = []
+
+    entities = []
+    for i in range(shape['entities']):
+        package = f"com.bench.model.m{i % 12}"
+        name = f"Entity{i}"
+        # Re-derive the field list the same way entity_class does so services can call it
+        state = rng.getstate()
+        field_count = rng.randint(3, 18)
+        fields = [(rng.choice(FIELD_TYPES), f"field{f}") for f in range(field_count)]
+        rng.setstate(state)
+        files.append((f"project/src/main/java/{package.replace('.', '/')}/{name}.java",
+                      entity_class(rng, package, name)))
+        entities.append((package, name, fields))
+
+    for i in range(shape['giants']):
+        package = "com.bench.core"
+        name = f"Engine{i}"
+        files.append((f"project/src/main/java/com/bench/core/{name}.java",
+                      giant_class(rng, package, name, shape['giant_methods'],
+                                  shape['nesting_depth'], shape['switch_cases'])))
+
+    for i in range(shape['services']):
+        package = "com.bench.service"
+        name = f"Service{i}"
+        files.append((f"project/src/main/java/com/bench/service/{name}.java",
+                      service_class(rng, package, name, entities)))
+
+    # Skipped by the analyzer: tests and JavaFX sources
+    files.append(("project/src/test/java/com/bench/EngineTest.java",
+                  "package com.bench;\n\npublic class EngineTest {\n    public void testAll() {}\n}\n"))
+    files.append(("project/src/main/java/com/bench/ui/MainView.java",
+                  "package com.bench.ui;\n\nimport javafx.application.Application;\n\n"
+                  "public class MainView {\n    public void show() {}\n}\n"))
+
+    # Vendored copies of existing files, served from the in-archive duplicate check
+    for path, source in rng.sample(files[:shape['entities']], min(shape['duplicates'], shape['entities'])):
+        files.append(("project/vendor/" + path.split('/src/main/java/', 1)[1], source))
+
+    # Generated last so the other files don't depend on their random draws
+    for i in range(shape['grids']):
+        package = "com.bench.grid"
+        name = f"Grid{i}"
+        files.append((f"project/src/main/java/com/bench/grid/{name}.java",
+                      grid_class(rng, package, name, shape['nesting_depth'])))
+
+    return files
+
+
+def write_zip(files, target):
+    """Write (path, source) pairs to a path or binary file object"""
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        for path, source in files:
+            info = zipfile.ZipInfo(path, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zip_ref.writestr(info, source)
+
+
+def project_zip(profile='small', seed=0):
+    """Bytes of the archive for a profile"""
+    buffer = io.BytesIO()
+    write_zip(generate_project(profile, seed), buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='Path of the zip to write')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    files = generate_project(args.profile, args.seed)
+    write_zip(files, args.output)
+    lines = sum(source.count('\n') for _, source in files)
+    print(f"wrote {args.output}: {len(files)} files, {lines} lines")
+
+
+if __name__ == '__main__':
+    main()
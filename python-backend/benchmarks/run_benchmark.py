@@ -0,0 +1,254 @@
+"""
+Analysis Benchmark
+
+Runs traverse_zip over a synthetic corpus (see corpus.py) or a real
+project and reports throughput, peak memory and where the time went.
+With --golden the smells are compared against a stored result and the
+run fails if any smell was added, removed or changed.
+
+Usage:
+    python benchmarks/run_benchmark.py [--profile small|medium|large | --zip project.zip]
+                                       [--mode rules|full] [--workers N] [--repeat N] [--concurrency N]
+                                       [--golden FILE [--update-golden]] [--cache]
+
+Modes:
+    rules   rule-based detectors only (torch is never imported)
+    full    rule-based detectors plus the Complex Method and Feature Envy models
+
+--concurrency N analyzes the archive N times at once on separate threads,
+like concurrent uploads to the threaded Flask server; throughput is then
+counted over all N analyses.
+
+The result and prediction caches are disabled unless --cache is given so
+that every run measures a cold analysis. Golden files for the rules mode are committed
+under benchmarks/golden/; the full mode depends on the model files, so
+generate its golden with --update-golden on a machine that has them.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import corpus  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--profile', choices=sorted(corpus.PROFILES), default='small')
+    source.add_argument('--zip', help='Analyze this archive instead of a synthetic corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=['rules', 'full'], default='rules')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = serial)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs to time; the fastest is reported')
+    parser.add_argument('--concurrency', type=int, default=1, help='Concurrent analyses per run (threads)')
+    parser.add_argument('--cache', action='store_true', help='Keep the result and prediction caches enabled')
+    parser.add_argument('--golden', help='Golden result JSON to compare against')
+    parser.add_argument('--update-golden', action='store_true', help='Write the result to --golden instead')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # Read by config.py, so this must happen before smell_detector is imported
+    os.environ['ENABLE_SEMANTIC_DETECTORS'] = '1' if args.mode == 'full' else '0'
+    if not args.cache:
+        os.environ['RESULT_CACHE_DIR'] = 'off'
+        os.environ['RESULT_CACHE_ENTRIES'] = '0'
+        os.environ['PREDICTION_CACHE_DIR'] = 'off'
+        os.environ['PREDICTION_CACHE_ENTRIES'] = '0'
+
+
+def count_methods(archive_path, is_java_source):
+    """Methods and constructors in the analyzed files, counted outside the timed region"""
+    import javalang
+
+    methods = 0
+    with zipfile.ZipFile(archive_path) as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or not is_java_source(info):
+                continue
+            content = zip_ref.read(info).decode('utf-8', errors='ignore')
+            try:
+                tree = javalang.parse.parse(content)
+            except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+                continue
+            for _, _ in tree.filter(javalang.tree.MethodDeclaration):
+                methods += 1
+            for _, _ in tree.filter(javalang.tree.ConstructorDeclaration):
+                methods += 1
+    return methods
+
+
+def normalize(result):
+    """Deterministic form of a traverse_zip result for golden comparison"""
+    return {
+        path: sorted(smells, key=lambda smell: json.dumps(smell, sort_keys=True))
+        for path, smells in sorted(result.items())
+    }
+
+
+def compare_golden(expected, actual):
+    """Human readable differences between two normalized results"""
+    differences = []
+    for path in sorted(set(expected) | set(actual)):
+        before = Counter(json.dumps(s, sort_keys=True) for s in expected.get(path, []))
+        after = Counter(json.dumps(s, sort_keys=True) for s in actual.get(path, []))
+        differences += [f"- {path}: {smell}" for smell in sorted((before - after).elements())]
+        differences += [f"+ {path}: {smell}" for smell in sorted((after - before).elements())]
+    return differences
+
+
+def histogram_sums(delta, name):
+    """{label value: total seconds} of a single-label histogram from a metrics delta"""
+    return {key[0]: state[1] for key, state in delta.get(name, {}).items()}
+
+
+def pipeline_occupancy(delta):
+    """{stage: {state: seconds}} of the analysis pipeline from a metrics delta"""
+    stages = {}
+    for (stage, state), seconds in delta.get('codesmell_pipeline_stage_seconds', {}).items():
+        stages.setdefault(stage, {})[state] = round(seconds, 4)
+    return stages
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    if args.zip:
+        archive_path = args.zip
+        label = os.path.basename(args.zip)
+    else:
+        archive_path = os.path.join(BENCHMARK_DIR, '.corpus', f"{args.profile}-{args.seed}.zip")
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        data = corpus.project_zip(args.profile, args.seed)
+        if not os.path.exists(archive_path) or open(archive_path, 'rb').read() != data:
+            with open(archive_path, 'wb') as handle:
+                handle.write(data)
+        label = f"{args.profile} (seed {args.seed})"
+
+    start = time.perf_counter()
+    import metrics
+    import smell_detector
+    startup = time.perf_counter() - start
+
+    with zipfile.ZipFile(archive_path) as zip_ref:
+        files = sum(1 for info in zip_ref.infolist()
+                    if not info.is_dir() and smell_detector.is_java_source(info))
+    methods = count_methods(archive_path, smell_detector.is_java_source)
+
+    metrics.REGISTRY.clear()
+    best = None
+    for _ in range(max(1, args.repeat)):
+        metrics.REGISTRY.collect_delta()
+        start = time.perf_counter()
+        if args.concurrency > 1:
+            with ThreadPoolExecutor(args.concurrency) as executor:
+                results = list(executor.map(
+                    lambda _: smell_detector.traverse_zip(archive_path, workers=args.workers),
+                    range(args.concurrency)))
+            result = results[0]
+            if any(other != result for other in results[1:]):
+                print("Concurrent analyses of the same archive disagree")
+                sys.exit(1)
+        else:
+            result = smell_detector.traverse_zip(archive_path, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        delta = metrics.REGISTRY.collect_delta()
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result, delta)
+    elapsed, result, delta = best
+
+    # Join the worker pool so their memory shows up in RUSAGE_CHILDREN
+    if smell_detector._pool is not None:
+        smell_detector._pool.shutdown(wait=True)
+        smell_detector._pool = None
+    rss_self, rss_children = peak_rss_mb()
+
+    smell_count = sum(len(smells) for smells in result.values())
+    analyses = max(1, args.concurrency)
+    report = {
+        'corpus': label,
+        'mode': args.mode,
+        'workers': args.workers,
+        'concurrency': analyses,
+        'files': files,
+        'methods': methods,
+        'smells': smell_count,
+        'startup_seconds': round(startup, 4),
+        'seconds': round(elapsed, 4),
+        'files_per_second': round(files * analyses / elapsed, 2) if elapsed else None,
+        'methods_per_second': round(methods * analyses / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': round(rss_self, 1),
+        'peak_worker_rss_mb': round(rss_children, 1),
+        # Summed per file; with workers these add up across processes
+        'phase_seconds': {k: round(v, 4) for k, v in sorted(histogram_sums(delta, 'codesmell_phase_seconds').items())},
+        'detector_seconds': {k: round(v, 4) for k, v in sorted(
+            histogram_sums(delta, 'codesmell_detector_seconds').items(), key=lambda item: -item[1])},
+        'model_seconds': {k: round(v, 4) for k, v in sorted(histogram_sums(delta, 'codesmell_model_seconds').items())},
+        # Working / starved / blocked time per stage; the busiest stage is the bottleneck
+        'pipeline_seconds': pipeline_occupancy(delta),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"corpus:   {label}  [{args.mode}, workers={args.workers}, concurrency={analyses}]")
+        print(f"files:    {files}  methods: {methods}  smells: {smell_count}")
+        print(f"startup:  {startup:8.3f} s")
+        print(f"analysis: {elapsed:8.3f} s  {report['files_per_second']} files/s  "
+              f"{report['methods_per_second']} methods/s")
+        print(f"peak RSS: {rss_self:8.1f} MB (workers {rss_children:.1f} MB)")
+        for section in ('phase_seconds', 'model_seconds', 'detector_seconds'):
+            if report[section]:
+                print(f"{section.replace('_', ' ')}:")
+                for name, seconds in report[section].items():
+                    print(f"  {name:<40} {seconds:8.4f}")
+        if report['pipeline_seconds']:
+            print(f"pipeline occupancy:     {'busy':>8} {'starved':>8} {'blocked':>8}")
+            for stage in ('produce', 'infer', 'emit'):
+                states = report['pipeline_seconds'].get(stage, {})
+                total = sum(states.values()) or 1.0
+                print(f"  {stage:<20} " + " ".join(
+                    f"{states.get(state, 0.0) / total:8.1%}" for state in ('busy', 'starved', 'blocked')))
+
+    if args.golden:
+        actual = normalize(result)
+        if args.update_golden:
+            with open(args.golden, 'w', encoding='utf-8') as handle:
+                json.dump(actual, handle, indent=1, sort_keys=True)
+                handle.write('\n')
+            print(f"golden written: {args.golden}")
+            return
+        with open(args.golden, encoding='utf-8') as handle:
+            expected = json.load(handle)
+        differences = compare_golden(expected, actual)
+        if differences:
+            print(f"GOLDEN MISMATCH: {len(differences)} difference(s)")
+            for line in differences[:50]:
+                print("  " + line)
+            sys.exit(1)
+        print("golden: identical")
+
+
+if __name__ == '__main__':
+    main()
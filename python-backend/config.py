@@ -0,0 +1,187 @@
+"""
+Service Configuration
+
+Runtime settings for the analysis service. Every value can be overridden
+with an environment variable of the same name (e.g. in .env.production or
+the PM2 ecosystem file).
+"""
+
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name, default):
+    value = os.getenv(name)
+    return value.strip() if value and value.strip() else default
+
+
+# =============================================================================
+# DETECTORS
+# =============================================================================
+
+# Run the transformer-based detectors (Complex Method, Feature Envy).
+# Disable for a rules-only process that never imports torch.
+ENABLE_SEMANTIC_DETECTORS = _env_bool("ENABLE_SEMANTIC_DETECTORS", True)
+
+# Load the models when the service (or an analysis worker process) starts,
+# instead of on the first upload that needs them.
+PRELOAD_MODELS = _env_bool("PRELOAD_MODELS", True)
+
+# Report "High Class Complexity" for classes whose methods' cyclomatic
+# complexity sums above CLASS_COMPLEXITY_THRESHOLD (WMC). Off by default.
+ENABLE_CLASS_COMPLEXITY = _env_bool("ENABLE_CLASS_COMPLEXITY", False)
+
+# =============================================================================
+# MODEL INFERENCE
+# =============================================================================
+
+# Backend running both classifiers: "pytorch" (fp32, default), "quantized"
+# (dynamic int8 Linear layers, CPU) or "onnx" (ONNX Runtime, CPU; requires
+# the onnxruntime package and falls back to pytorch without it).
+INFERENCE_BACKEND = _env_str("INFERENCE_BACKEND", "pytorch").lower()
+
+# Model tier: "full" (the trained 512-token encoders, default) or "student"
+# (smaller models distilled from them with tools/distill_student.py, stored
+# next to them as complex-method-student/ and feature-envy-student/). A
+# missing student falls back to the full model.
+MODEL_TIER = _env_str("MODEL_TIER", "full").lower()
+
+# Where ONNX exports of the models are written on first use.
+ONNX_EXPORT_DIR = _env_str(
+    "ONNX_EXPORT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "onnx"),
+)
+
+# Calibrated metric-based cascade (see tools/calibrate_cascade.py) that lets
+# clearly clean methods skip the Complex Method model. A missing file or
+# "off" disables it.
+COMPLEX_METHOD_CASCADE_PATH = _env_str(
+    "COMPLEX_METHOD_CASCADE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "complex-method-cascade.json"),
+)
+if COMPLEX_METHOD_CASCADE_PATH.lower() == "off":
+    COMPLEX_METHOD_CASCADE_PATH = None
+
+# Complex Method snippets are queued across files and classified in batches
+# of at most this many samples...
+COMPLEX_METHOD_BATCH_SIZE = _env_int("COMPLEX_METHOD_BATCH_SIZE", 32)
+
+# ...and at most this many tokens once padded to the batch's longest sample.
+COMPLEX_METHOD_MAX_BATCH_TOKENS = _env_int("COMPLEX_METHOD_MAX_BATCH_TOKENS", 8192)
+
+# Feature Envy samples of a file are split into chunks of at most this many
+# samples and padded tokens. Activation memory grows with the padded token
+# count, so the token budget is what bounds a worker's peak memory.
+FEATURE_ENVY_BATCH_SIZE = _env_int("FEATURE_ENVY_BATCH_SIZE", 32)
+FEATURE_ENVY_MAX_BATCH_TOKENS = _env_int("FEATURE_ENVY_MAX_BATCH_TOKENS", 8192)
+
+# Analysis is pipelined: files are parsed, rule-checked and their snippets
+# extracted while earlier files wait for the models. Snippets are handed to
+# the inference stage in chunks of this many...
+INFERENCE_FLUSH_SAMPLES = _env_int("INFERENCE_FLUSH_SAMPLES", 512)
+
+# ...and at most this many chunks wait for inference (or for the caller to
+# take their results) before parsing pauses. Together they bound the memory
+# held by files waiting for their predictions.
+PIPELINE_MAX_CHUNKS = _env_int("PIPELINE_MAX_CHUNKS", 2)
+
+# Each model is run by one inference thread that coalesces the snippets of
+# all in-flight requests into shared batches, so concurrent uploads don't
+# run small batches against each other. Disable to run the model on the
+# calling thread.
+INFERENCE_COALESCE = _env_bool("INFERENCE_COALESCE", True)
+
+# A coalesced batch is closed once it holds this many snippets, or once its
+# first request has waited this many milliseconds for others to join.
+INFERENCE_COALESCE_MAX_SAMPLES = _env_int("INFERENCE_COALESCE_MAX_SAMPLES", 256)
+INFERENCE_COALESCE_WAIT_MS = _env_int("INFERENCE_COALESCE_WAIT_MS", 5)
+
+# torch intra-op threads used by the inference threads (0 keeps torch's
+# default of one per core).
+INFERENCE_THREADS = _env_int("INFERENCE_THREADS", 0)
+
+# =============================================================================
+# PARALLEL ANALYSIS
+# =============================================================================
+
+# Number of worker processes traverse_zip spreads .java files across.
+# 0 or 1 analyzes files serially in the request process.
+ANALYSIS_WORKERS = _env_int("ANALYSIS_WORKERS", 0)
+
+# Multiprocessing start method for the worker pool. "spawn" is the safe
+# default once torch has started its thread pools in the parent.
+ANALYSIS_START_METHOD = _env_str("ANALYSIS_START_METHOD", "spawn")
+
+# =============================================================================
+# UPLOADS
+# =============================================================================
+
+# Uploads larger than this many bytes are streamed to a temp file on disk
+# instead of being held in memory.
+UPLOAD_SPOOL_MAX_BYTES = _env_int("UPLOAD_SPOOL_MAX_BYTES", 8 * 1024 * 1024)
+
+# Directory for spooled uploads; empty uses the system temp directory.
+UPLOAD_TMP_DIR = _env_str("UPLOAD_TMP_DIR", None)
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+# Per-process in-memory LRU size (files). 0 disables the memory tier.
+RESULT_CACHE_ENTRIES = _env_int("RESULT_CACHE_ENTRIES", 4096)
+
+# Directory of an optional on-disk tier shared by all worker processes,
+# also holding the metrics tables (one file per distinct file content,
+# never evicted); unset or "off" keeps results in memory only.
+RESULT_CACHE_DIR = _env_str("RESULT_CACHE_DIR", None)
+if RESULT_CACHE_DIR and RESULT_CACHE_DIR.lower() == "off":
+    RESULT_CACHE_DIR = None
+
+# =============================================================================
+# PREDICTION CACHE
+# =============================================================================
+
+# Model predictions cached per snippet (label and logits), keyed by model
+# version and snippet text. In-memory LRU size per model; 0 disables it.
+PREDICTION_CACHE_ENTRIES = _env_int("PREDICTION_CACHE_ENTRIES", 65536)
+
+# Directory of an optional on-disk tier (one file per snippet, never
+# evicted); unset or "off" keeps predictions in memory only.
+PREDICTION_CACHE_DIR = _env_str("PREDICTION_CACHE_DIR", None)
+if PREDICTION_CACHE_DIR and PREDICTION_CACHE_DIR.lower() == "off":
+    PREDICTION_CACHE_DIR = None
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+# Analysis jobs run concurrently by POST /jobs.
+JOB_WORKERS = _env_int("JOB_WORKERS", 1)
+
+# Queued plus running jobs accepted before POST /jobs answers 503.
+JOB_MAX_PENDING = _env_int("JOB_MAX_PENDING", 16)
+
+# Directory holding the job database and the archives waiting to be analyzed.
+JOB_DIR = _env_str(
+    "JOB_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs"),
+)
+
+# Finished jobs (and their results) are deleted after this many seconds.
+JOB_RETENTION_SECONDS = _env_int("JOB_RETENTION_SECONDS", 24 * 60 * 60)
@@ -1,13 +1,12 @@
 import javalang
-from javalang.ast import walk_tree
 from javalang.tree import (
     StatementExpression,
     MethodInvocation,
-    IfStatement,
     Literal,
     MemberReference,
     BinaryOperation,
 )
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
 # Which logging calls we care about
@@ -32,7 +31,8 @@ GUARD_METHODS = {
     "severe": {"isLoggable"},
 }
 
-def detect_expensive_log_statement(node, source_lines, filepath, filename, **kwargs):
+@handles(StatementExpression)
+def detect_expensive_log_statement(node, source_lines, filepath, filename, context=None, **kwargs):
     if not isinstance(node, StatementExpression):
         return None
 
@@ -44,24 +44,12 @@ def detect_expensive_log_statement(node, source_lines, filepath, filename, **kwa
     if level not in LOG_LEVELS:
         return None
 
-    # 2) Check for a surrounding if‐guard
-    guarded = False
-    parent = getattr(node, 'parent', None)
-    while parent:
-        if isinstance(parent, IfStatement):
-            # inspect its condition subtree for a guard call
-            for _, cond_node in walk_tree(parent.condition):
-                if (isinstance(cond_node, MethodInvocation)
-                    and cond_node.member in GUARD_METHODS.get(level, ())
-                    # java.util.logging: must also match Level argument,
-                    # but we'll skip that extra check here for brevity
-                   ):
-                    guarded = True
-                    break
-            if guarded:
-                return None
-
-        parent = getattr(parent, 'parent', None)
+    # 2) Check for a surrounding if‐guard: the walk keeps the calls made in
+    # the conditions of the ifs whose then branch holds this statement.
+    # java.util.logging: the Level argument of isLoggable isn't matched
+    ancestry = getattr(context, 'ancestry', None)
+    if ancestry is not None and not ancestry.guard_calls.isdisjoint(GUARD_METHODS.get(level, ())):
+        return None
 
     args = mi.arguments or []
     is_expensive = False
@@ -1,9 +1,11 @@
 import javalang
 from javalang.tree import InterfaceDeclaration, MethodDeclaration, Annotation
 from javalang.ast import walk_tree
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_implicit_functional_interface(node, source_lines, filepath, filename):
+@handles(InterfaceDeclaration)
+def detect_implicit_functional_interface(node, source_lines, filepath, filename, context=None):
     if not isinstance(node, InterfaceDeclaration):
         return None
 
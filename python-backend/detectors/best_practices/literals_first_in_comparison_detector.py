@@ -1,6 +1,7 @@
 import javalang
 from javalang.tree import MethodInvocation, Literal
 from javalang.ast import walk_tree
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
 # Methods where we want literals first
@@ -15,7 +16,8 @@ _COMPARISONS = {
 def _is_string_literal(expr):
     return isinstance(expr, Literal) and expr.value.startswith('"') and expr.value.endswith('"')
 
-def detect_literals_first_in_comparison(node, source_lines, filepath, filename):
+@handles(MethodInvocation)
+def detect_literals_first_in_comparison(node, source_lines, filepath, filename, context=None):
     if not isinstance(node, MethodInvocation):
         return None
 
@@ -1,8 +1,10 @@
 import javalang
 from javalang.ast import walk_tree
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_reassigning_catch_variables(node, source_lines, filepath, filename, allow_private=True):
+@handles(javalang.tree.CatchClause)
+def detect_reassigning_catch_variables(node, source_lines, filepath, filename, context=None, allow_private=True):
     # Ensure the node is a CatchClause
     if not isinstance(node, javalang.tree.CatchClause):
         return None
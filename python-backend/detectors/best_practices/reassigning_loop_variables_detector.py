@@ -1,5 +1,5 @@
 import javalang
-from javalang.ast import walk_tree
+from javalang.ast import Node
 from javalang.tree import (
     ForStatement,
     ForControl,
@@ -8,30 +8,96 @@ from javalang.tree import (
     MemberReference,
     Assignment
 )
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def get_variable_usages(node, var_names):
-    usages = []
-    for path, child in walk_tree(node):
-        if isinstance(child, MemberReference) and child.member in var_names:
-            usages.append((child, path))
-    return usages
+def loop_variables(control):
+    """Names declared by a for loop's control, or None for other controls"""
+    loop_vars = set()
+    if isinstance(control, EnhancedForControl):
+        # control.var might be a VariableDeclaration or a simple parameter node
+        var_node = control.var
+        if isinstance(var_node, VariableDeclaration):
+            for d in var_node.declarators:
+                loop_vars.add(d.name)
+        else:
+            # likely a FormalParameter-like node
+            loop_vars.add(var_node.name)
+    elif isinstance(control, ForControl):
+        # control.init is a list of expressions (i = 0, j = 1) or a single
+        # VariableDeclaration; iterating the latter walks its subtree, which
+        # yields no declarations, so declared counters are not collected
+        if control.init:
+            for init_item in control.init:
+                if isinstance(init_item, VariableDeclaration):
+                    for d in init_item.declarators:
+                        loop_vars.add(d.name)
+    else:
+        return None
+    return loop_vars
+
+
+def is_increment(usage):
+    """++/-- attached to the reference"""
+    return any(op in ('++', '--') for op in (usage.prefix_operators or ())) or \
+        any(op in ('++', '--') for op in (usage.postfix_operators or ()))
+
+
+def find_loop_variable_writes(root):
+    """
+    id(ForStatement) -> references writing one of its loop variables
+    inside its body, in source order, for every for loop under root.
+
+    One pass keeps the stack of loops whose body is being walked, with
+    their variable sets, and checks each assignment target and ++/-- against
+    it, so nested loop bodies are not walked again per enclosing loop.
+    """
+    writes = {}
+    targets = set()  # ids of the references being assigned to
+    # (item, active loops: ((id of the ForStatement, its variables), ...))
+    stack = [(root, ())]
+    while stack:
+        item, active = stack.pop()
+        if not isinstance(item, Node):
+            for child in reversed(item):
+                if isinstance(child, (Node, list, tuple)):
+                    stack.append((child, active))
+            continue
+
+        if isinstance(item, MemberReference) and active and (id(item) in targets or is_increment(item)):
+            for loop_id, loop_vars in active:
+                if item.member in loop_vars:
+                    writes[loop_id].append(item)
+        elif isinstance(item, Assignment):
+            targets.add(id(item.expressionl))
+
+        body, body_active = None, active
+        if isinstance(item, ForStatement):
+            writes[id(item)] = []
+            loop_vars = loop_variables(item.control)
+            if loop_vars:
+                # Only the body is inside the loop; the control is not
+                body, body_active = item.body, active + ((id(item), loop_vars),)
+        for child in reversed(item.children):
+            if isinstance(child, (Node, list, tuple)):
+                stack.append((child, body_active if child is body else active))
+    return writes
 
-def is_write_usage(usage, path):
-    parent = path[-1] if path else None
-    # direct assignment to the variable?
-    if isinstance(parent, Assignment) and parent.expressionl == usage:
-        return True
-    # ++/-- attached?
-    if getattr(usage, 'prefix_operators', None):
-        if any(op in ('++', '--') for op in usage.prefix_operators):
-            return True
-    if getattr(usage, 'postfix_operators', None):
-        if any(op in ('++', '--') for op in usage.postfix_operators):
-            return True
-    return False
 
-def detect_reassigning_loop_variables(node, source_lines, filepath, filename,
+def get_loop_variable_writes(context, node):
+    """
+    find_loop_variable_writes of the file being analyzed, found once per
+    file; of node alone without a context
+    """
+    if context is None:
+        return find_loop_variable_writes(node)
+    if context.loop_variable_writes is None:
+        context.loop_variable_writes = find_loop_variable_writes(context.tree)
+    return context.loop_variable_writes
+
+
+@handles(ForStatement)
+def detect_reassigning_loop_variables(node, source_lines, filepath, filename, context=None,
                                       foreach_reassign='deny',
                                       for_reassign='deny'):
     """
@@ -42,49 +108,29 @@ def detect_reassigning_loop_variables(node, source_lines, filepath, filename,
     if not isinstance(node, ForStatement):
         return None
 
-    violations = []
     ctrl = node.control
-    loop_vars = set()
-
-    # --- collect loop variable names ---
     if isinstance(ctrl, EnhancedForControl):
-        # ctrl.var might be a VariableDeclaration or a simple parameter node
-        var_node = ctrl.var
-        if isinstance(var_node, VariableDeclaration):
-            for d in var_node.declarators:
-                loop_vars.add(d.name)
-        else:
-            # likely a FormalParameter-like node
-            loop_vars.add(var_node.name)
-
         mode = foreach_reassign
-
     elif isinstance(ctrl, ForControl):
-        # ctrl.init is a list of init elements (vars or exprs)
-        if ctrl.init:
-            for init_item in ctrl.init:
-                if isinstance(init_item, VariableDeclaration):
-                    for d in init_item.declarators:
-                        loop_vars.add(d.name)
         mode = for_reassign
-
     else:
         return None  # not a for‐loop we care about
 
-    # --- if the mode is "deny", find any writes ---
-    if mode == 'deny' and loop_vars:
-        for usage, path in get_variable_usages(node.body, loop_vars):
-            if is_write_usage(usage, path):
-                line = usage.position.line if usage.position else 1
-                violations.append({
-                    "codeSmellType": "Reassigning Loop Variable",
-                    "filename": filename,
-                    "filepath": filepath,
-                    "startline": line,
-                    "endline":   line,
-                    "code":      "RLV",
-                    "category":  "Best Practices",
-                    "weight":    SMELL_CATEGORY_WEIGHTS.get("Reassigning Loop Variable", 2)
-                })
+    # --- if the mode is "deny", report its writes ---
+    if mode != 'deny':
+        return None
+    violations = []
+    for usage in get_loop_variable_writes(context, node).get(id(node), ()):
+        line = usage.position.line if usage.position else 1
+        violations.append({
+            "codeSmellType": "Reassigning Loop Variable",
+            "filename": filename,
+            "filepath": filepath,
+            "startline": line,
+            "endline":   line,
+            "code":      "RLV",
+            "category":  "Best Practices",
+            "weight":    SMELL_CATEGORY_WEIGHTS.get("Reassigning Loop Variable", 2)
+        })
 
-    return violations or None 
\ No newline at end of file
+    return violations or None
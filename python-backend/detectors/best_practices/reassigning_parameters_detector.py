@@ -7,9 +7,11 @@ from javalang.tree import (
     Assignment,
     MemberReference,
 )
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_reassigning_parameters(node, source_lines, filepath, filename, **kwargs):
+@handles(MethodDeclaration, ConstructorDeclaration)
+def detect_reassigning_parameters(node, source_lines, filepath, filename, context=None, **kwargs):
     if not isinstance(node, (MethodDeclaration, ConstructorDeclaration)):
         return None
     if not node.body:
@@ -1,12 +1,14 @@
 import javalang
 from javalang.ast import walk_tree
 from javalang.tree import StatementExpression, MethodInvocation
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
 # methods on ResultSet whose return value must be checked
 _METHODS = {"next", "previous", "first", "last"}
 
-def detect_result_set_check(node, source_lines, filepath, filename):
+@handles(StatementExpression)
+def detect_result_set_check(node, source_lines, filepath, filename, context=None):
     # Only top‐level statement expressions
     if not isinstance(node, StatementExpression):
         return None
@@ -1,46 +1,21 @@
-import javalang
-from javalang.tree import (
-    LocalVariableDeclaration,
-    MemberReference,
-    Assignment,
-)
-from javalang.ast import walk_tree
+from javalang.tree import LocalVariableDeclaration
+from ..def_use import declaration_key, get_unused_locals
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-# Cache full ASTs per file to avoid reparsing
-_ast_cache = {}
 _IGNORED_PREFIXES = ("ignored", "unused")
 
-def _is_read_usage(ref, path):
-    parent = path[-1] if path else None
-    return not (isinstance(parent, Assignment) and parent.expressionl is ref)
-
-def detect_unused_local_variable(node, source_lines, filepath, filename):
+@handles(LocalVariableDeclaration)
+def detect_unused_local_variable(node, source_lines, filepath, filename, context=None):
     # Only handle local var declarations
-    if not isinstance(node, LocalVariableDeclaration):
+    if not isinstance(node, LocalVariableDeclaration) or node.position is None:
         return None
 
-    # Build or fetch full AST for this file
-    if filepath not in _ast_cache:
-        code = "\n".join(source_lines)
-        try:
-            _ast_cache[filepath] = javalang.parse.parse(code)
-        except javalang.parser.JavaSyntaxError:
-            _ast_cache[filepath] = None
-    tree = _ast_cache[filepath]
-    if tree is None:
+    # Locals never read in their scope, found by one pass over the file
+    unused = get_unused_locals(context, source_lines)
+    if not unused:
         return None
 
-    # Gather all read‐uses for each name in the file
-    reads = {}
-    for path, child in walk_tree(tree):
-        if isinstance(child, MemberReference):
-            name = child.member
-            if name not in reads:
-                reads[name] = []
-            if _is_read_usage(child, path):
-                reads[name].append(child)
-
     violations = []
     for decl in node.declarators:
         name = decl.name
@@ -48,9 +23,7 @@ def detect_unused_local_variable(node, source_lines, filepath, filename):
         if any(name.startswith(p) for p in _IGNORED_PREFIXES):
             continue
 
-        used = bool(reads.get(name))
-
-        if not used:
+        if declaration_key(node, name) in unused:
             ln = decl.position.line if decl.position else node.position.line
             violations.append({
                 "codeSmellType": "Unused Local Variable",
@@ -0,0 +1,45 @@
+"""
+File Analysis Context
+
+Holds everything detectors need about one source file so that it is
+tokenized and parsed exactly once: the original source, its lines, the
+token stream, the AST and the span index built from the tokens, and the
+metrics table once a detector has asked for it.
+"""
+
+import javalang
+
+from .spans import SpanIndex
+
+
+class FileContext:
+    def __init__(self, content, filepath):
+        self.content = content
+        self.source_lines = content.splitlines()
+        self.filepath = filepath
+        self.filename = filepath.split('/')[-1]
+
+        # Raises javalang.tokenizer.LexerError / javalang.parser.JavaSyntaxError
+        # exactly like javalang.parse.parse
+        self.tokens = list(javalang.tokenizer.tokenize(content))
+        self.tree = javalang.parser.Parser(self.tokens).parse()
+        self.spans = SpanIndex(self.tokens)
+
+        # InferenceQueue semantic detectors submit to instead of running
+        # their model per node (see semantics/inference.py); None runs inline
+        self.inference = None
+
+        # Method and type metrics, filled by the first detector that needs
+        # them (see metrics_table.get_metrics_table)
+        self.metrics_table = None
+
+        # Keys of the never-read local variables (see def_use.get_unused_locals)
+        self.unused_locals = None
+
+        # Loop variable writes per for loop (see
+        # reassigning_loop_variables_detector.get_loop_variable_writes)
+        self.loop_variable_writes = None
+
+        # Enclosing nodes and guards of the node being visited, while the
+        # tree is walked (see registry.Ancestry); None before the walk
+        self.ancestry = None
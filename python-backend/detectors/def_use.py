@@ -0,0 +1,225 @@
+"""
+Local Variable Def-Use Analysis
+
+Finds the local variables of a file that are declared but never read, in
+one pass over its AST. Names are resolved against a stack of lexical
+scopes (method bodies, blocks, for and try headers, catch clauses,
+lambdas and class bodies), so a variable is only used by references that
+actually see it: a local shadowed in a nested block, a lambda parameter or
+a field of a local or anonymous class does not use the outer variable.
+
+Each name keeps a stack of its visible declarations, so declaring,
+resolving and leaving a scope are constant time and the pass is linear in
+the size of the tree.
+
+Plain assignments (x = ...) and compound ones (x += ...) are writes, not
+reads. A variable used as a qualifier (x.field, x.call()) or indexed
+(x[i] = ...) is read.
+"""
+
+import javalang
+from javalang.ast import Node
+from javalang.tree import (
+    Assignment,
+    BlockStatement,
+    CatchClause,
+    CatchClauseParameter,
+    ClassCreator,
+    ConstructorDeclaration,
+    EnumBody,
+    FieldDeclaration,
+    ForStatement,
+    FormalParameter,
+    InferredFormalParameter,
+    LambdaExpression,
+    LocalVariableDeclaration,
+    MemberReference,
+    MethodDeclaration,
+    MethodReference,
+    Primary,
+    SwitchStatement,
+    TryResource,
+    TryStatement,
+    TypeDeclaration,
+    VariableDeclaration,
+)
+
+# Nodes whose declarations are only visible inside them
+SCOPE_TYPES = (
+    BlockStatement,
+    SwitchStatement,
+    ForStatement,
+    TryStatement,
+    CatchClause,
+    LambdaExpression,
+    MethodDeclaration,
+    ConstructorDeclaration,
+    TypeDeclaration,
+)
+
+# Actions of the pass
+_VISIT = 0         # resolve a node's references, then visit its children
+_FIELD_ACCESS = 1  # a selector (obj.member): not a variable of its own
+_DECLARE = 2       # make a name visible in the innermost scope
+_CLASS_BODY = 3    # open the scope of an anonymous class body and visit it
+_CLOSE = 4         # leave the innermost scope
+
+
+def declaration_key(declaration, name):
+    """
+    Identifies a local variable across parses of the same source: the
+    position of its LocalVariableDeclaration and its name (declarators
+    have no position of their own)
+    """
+    position = declaration.position
+    return (position.line, position.column, name) if position else None
+
+
+def _field_names(members):
+    for member in members:
+        if isinstance(member, FieldDeclaration):
+            for declarator in member.declarators:
+                yield declarator.name
+
+
+def _member_names(node):
+    """Fields (and enum constants) of a type, visible in its whole body"""
+    body = node.body
+    if isinstance(body, EnumBody):
+        return [constant.name for constant in body.constants or []] + list(_field_names(body.declarations or []))
+    return list(_field_names(body or []))
+
+
+def _is_plain_name(node):
+    return isinstance(node, MemberReference) and not node.qualifier and not node.selectors
+
+
+def find_unused_locals(root):
+    """declaration_key of every local variable under root that is never read, in source order"""
+    visible = {}  # name -> keys of its visible declarations, innermost last (None: not a local)
+    scopes = [[]]  # names declared in each open scope
+    unused = {}  # keys of locals not read so far, in declaration order
+
+    def declare(name, key=None):
+        visible.setdefault(name, []).append(key)
+        scopes[-1].append(name)
+        if key is not None:
+            unused[key] = None
+
+    def read(name):
+        declarations = visible.get(name)
+        if declarations and declarations[-1] is not None:
+            unused.pop(declarations[-1], None)
+
+    stack = [(_VISIT, root)]
+    while stack:
+        action, item = stack.pop()
+
+        if action == _CLOSE:
+            for name in scopes.pop():
+                declarations = visible[name]
+                declarations.pop()
+                if not declarations:
+                    del visible[name]
+            continue
+        if action == _DECLARE:
+            declare(*item)
+            continue
+        if action == _CLASS_BODY:
+            scopes.append([])
+            stack.append((_CLOSE, None))
+            for name in _field_names(item):
+                declare(name)
+            stack.append((_VISIT, item))
+            continue
+
+        if not isinstance(item, Node):
+            # A list of children
+            for child in reversed(item):
+                if isinstance(child, (Node, list, tuple)):
+                    stack.append((_VISIT, child))
+            continue
+
+        node = item
+        if isinstance(node, SCOPE_TYPES):
+            scopes.append([])
+            stack.append((_CLOSE, None))
+
+        # Declarations: only the parts that can reference variables are visited
+        if isinstance(node, VariableDeclaration):
+            is_local = isinstance(node, LocalVariableDeclaration)
+            for declarator in reversed(node.declarators):
+                # Visible after its own initializer
+                key = declaration_key(node, declarator.name) if is_local else None
+                stack.append((_DECLARE, (declarator.name, key)))
+                if declarator.initializer is not None:
+                    stack.append((_VISIT, declarator.initializer))
+            continue
+        if isinstance(node, (FormalParameter, InferredFormalParameter, CatchClauseParameter)):
+            declare(node.name)
+            continue
+        if isinstance(node, TryResource):
+            stack.append((_DECLARE, (node.name, None)))
+            stack.append((_VISIT, node.value))
+            continue
+        if isinstance(node, LambdaExpression):
+            for parameter in node.parameters or []:
+                # A single untyped parameter is parsed as a MemberReference
+                declare(parameter.member if isinstance(parameter, MemberReference) else parameter.name)
+            if node.body is not None:
+                stack.append((_VISIT, node.body))
+            continue
+        if isinstance(node, (MethodDeclaration, ConstructorDeclaration)):
+            if node.body is not None:
+                stack.append((_VISIT, node.body))
+            stack.append((_VISIT, node.parameters))
+            continue
+        if isinstance(node, TypeDeclaration):
+            for name in _member_names(node):
+                declare(name)
+        elif isinstance(node, MethodReference):
+            # The method name (list::add) is not a variable
+            stack.append((_VISIT, node.expression))
+            continue
+        elif isinstance(node, Assignment) and _is_plain_name(node.expressionl):
+            # Writing the variable is not a use of it
+            stack.append((_VISIT, node.value))
+            continue
+
+        # References
+        if isinstance(node, Primary):
+            if node.qualifier:
+                read(node.qualifier.split('.')[0])
+            elif isinstance(node, MemberReference) and action == _VISIT:
+                read(node.member)
+
+        children = node.children
+        if isinstance(node, ClassCreator) and node.body is not None:
+            # The arguments are evaluated outside the class body
+            stack.append((_CLASS_BODY, node.body))
+            children = [child for child in children if child is not node.body]
+        selectors = node.selectors if isinstance(node, Primary) and node.selectors else ()
+        for child in reversed(children):
+            if child is selectors:
+                for selector in reversed(selectors):
+                    stack.append((_FIELD_ACCESS if isinstance(selector, MemberReference) else _VISIT, selector))
+            elif isinstance(child, (Node, list, tuple)):
+                stack.append((_VISIT, child))
+
+    return list(unused)
+
+
+def get_unused_locals(context, source_lines):
+    """
+    declaration_key set of the never-read locals of the file being
+    analyzed, found on first use; parsed from source_lines without a context
+    """
+    if context is not None:
+        if context.unused_locals is None:
+            context.unused_locals = frozenset(find_unused_locals(context.tree))
+        return context.unused_locals
+    try:
+        tree = javalang.parse.parse('\n'.join(source_lines))
+    except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+        return frozenset()
+    return frozenset(find_unused_locals(tree))
@@ -1,31 +1,34 @@
 import javalang
-from ..thresholds import CYCLOMATIC_COMPLEXITY_THRESHOLD, SMELL_CATEGORY_WEIGHTS
+from ..metrics_table import get_metrics_table
+from ..registry import handles
+from ..thresholds import CLASS_COMPLEXITY_THRESHOLD, CYCLOMATIC_COMPLEXITY_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
-def detect_cyclomatic_complexity(node, source_lines, filepath, filename):
+def cyclomatic_complexity(node):
+    """McCabe complexity of a node on its own (analyses read it from the metrics table)"""
+    complexity = 1
+    for path, child in javalang.ast.walk_tree(node):
+        if isinstance(child, (
+            javalang.tree.IfStatement,
+            javalang.tree.ForStatement,
+            javalang.tree.WhileStatement,
+            javalang.tree.DoStatement,
+            javalang.tree.SwitchStatement,
+            javalang.tree.TernaryExpression
+        )) or (
+            isinstance(child, javalang.tree.BinaryOperation) and child.operator in ['&&', '||']
+        ):
+            complexity += 1
+    return complexity
+
+
+@handles(javalang.tree.MethodDeclaration)
+def detect_cyclomatic_complexity(node, source_lines, filepath, filename, context=None):
     smells = []
-    if isinstance(node, (javalang.tree.MethodDeclaration, javalang.tree.ClassDeclaration)):
-        complexity = 1
-        for path, child in javalang.ast.walk_tree(node):
-            if isinstance(child, (
-                javalang.tree.IfStatement,
-                javalang.tree.ForStatement,
-                javalang.tree.WhileStatement,
-                javalang.tree.DoStatement,
-                javalang.tree.SwitchStatement,
-                javalang.tree.TernaryExpression
-            )) or (
-                isinstance(child, javalang.tree.BinaryOperation) and child.operator in ['&&', '||']
-            ):
-                complexity += 1
-        start_line = node.position.line if node.position else 1
-        brace_count = 0
-        end_line = start_line
-        for i, line in enumerate(source_lines[start_line-1:], start=start_line):
-            brace_count += line.count('{') - line.count('}')
-            if brace_count == 0 and '}' in line:
-                end_line = i
-                break
-        if isinstance(node, javalang.tree.MethodDeclaration) and complexity > CYCLOMATIC_COMPLEXITY_THRESHOLD:
+    if isinstance(node, javalang.tree.MethodDeclaration):
+        method = get_metrics_table(context, source_lines, node).get(node)
+        if method.cyclomatic_complexity > CYCLOMATIC_COMPLEXITY_THRESHOLD:
+            start_line = method.start_line or 1
+            end_line = method.end_line or start_line
             smells.append({
                 "codeSmellType": "High Cyclomatic Complexity (Method)",
                 "filename": filename,
@@ -37,4 +40,25 @@ def detect_cyclomatic_complexity(node, source_lines, filepath, filename):
                 "weight": SMELL_CATEGORY_WEIGHTS.get("High Cyclomatic Complexity (Method)", 3)
             })
 
-    return smells
\ No newline at end of file
+    return smells
+
+
+@handles(javalang.tree.ClassDeclaration)
+def detect_class_complexity(node, source_lines, filepath, filename, context=None):
+    """Weighted methods per class, summed from the method values of the metrics table"""
+    if isinstance(node, javalang.tree.ClassDeclaration):
+        metrics = get_metrics_table(context, source_lines, node).get(node)
+        if metrics.complexity > CLASS_COMPLEXITY_THRESHOLD:
+            start_line = metrics.start_line or 1
+            end_line = metrics.end_line or start_line
+            return {
+                "codeSmellType": "High Class Complexity",
+                "filename": filename,
+                "filepath": filepath,
+                "startline": start_line,
+                "endline": end_line,
+                "code": "WMC",
+                "category": "Design",
+                "weight": SMELL_CATEGORY_WEIGHTS.get("High Class Complexity", 3)
+            }
+    return None
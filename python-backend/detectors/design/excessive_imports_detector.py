@@ -1,7 +1,9 @@
 import javalang
+from ..registry import handles
 from ..thresholds import EXCESSIVE_IMPORTS_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
-def detect_excessive_imports(node, source_lines, filepath, filename):
+@handles(javalang.tree.CompilationUnit)
+def detect_excessive_imports(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.CompilationUnit):
         import_decls = node.imports
         import_count = len(import_decls)
@@ -1,45 +1,24 @@
 import javalang
+from ..metrics_table import get_metrics_table
+from ..registry import handles
 from ..thresholds import EXCESSIVE_PARAMETER_LIST_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
-def detect_excessive_parameter_list(node, source_lines, filepath, filename):
+@handles(javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)
+def detect_excessive_parameter_list(node, source_lines, filepath, filename, context=None):
     # Check if the node is a method or constructor declaration
     if isinstance(node, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
-        # Count the parameters
-        param_count = len(node.parameters)
-        
-        # Debug print to verify parameter count
-        # print(f"Detected method/constructor '{node.name}' with {param_count} parameters")
+        metrics = get_metrics_table(context, source_lines, node).get(node)
         
         # Threshold check
-        if param_count > EXCESSIVE_PARAMETER_LIST_THRESHOLD:
+        if metrics.parameters > EXCESSIVE_PARAMETER_LIST_THRESHOLD:
             # Determine start line
-            if node.position and node.position.line:
-                start_line = node.position.line
+            if metrics.start_line:
+                start_line = metrics.start_line
             else:
-                # print(f"Warning: {node.name} has no position info")
                 return None  # Skip if position is unknown
             
-            # Initialize end_line and attempt to find the closing brace
-            end_line = start_line
-            brace_count = 0
-            
-            # Check if the method has a block (body)
-            if hasattr(node, 'block') and node.block:
-                # Use the block's position to get the end line directly
-                end_line = node.block.position.line if node.block.position else start_line
-            else:
-                # Fallback: manually track braces (may not be reliable with nested blocks)
-                try:
-                    brace_count = 0
-                    for i in range(start_line - 1, len(source_lines)):
-                        line = source_lines[i]
-                        brace_count += line.count('{') - line.count('}')
-                        if brace_count <= 0:
-                            end_line = i + 1  # Lines are 1-based
-                            break
-                except Exception as e:
-                    # print(f"Error determining end line: {e}")
-                    end_line = start_line  # Fallback to start line
+            # End of the body (or of the declaration for abstract methods)
+            end_line = metrics.end_line or start_line
             
             # Return the detected smell
             return {
@@ -1,5 +1,8 @@
 import javalang
 import logging
+from ..metrics_table import get_metrics_table
+from ..registry import handles
+from ..spans import get_span_index
 from ..thresholds import NESTED_IF_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
 # Configure logging
@@ -17,53 +20,52 @@ def get_max_if_depth(statement, current_depth=0):
     return current_depth
 
 
-def get_first_if_line_of_nested_chain(statement, target_depth=3, current_depth=0, first_if_line=None):
+def get_first_if_of_nested_chain(statement, target_depth=3, current_depth=0, first_if=None):
     """
-    Recursively find the first if statement line number of the nested if chain
+    Recursively find the first if statement of the nested if chain
     with depth >= target_depth, counting depth only through then_statement branches.
     """
     if isinstance(statement, javalang.tree.IfStatement):
-        # If this is the first if in the chain, record its line number
-        if first_if_line is None and statement.position:
-            first_if_line = statement.position.line
+        # If this is the first if in the chain, record it
+        if first_if is None and statement.position:
+            first_if = statement
 
         if current_depth + 1 >= target_depth:
-            return first_if_line
+            return first_if
         
         # Only recurse into then_statement for depth counting
         if statement.then_statement:
-            return get_first_if_line_of_nested_chain(statement.then_statement, target_depth, current_depth + 1, first_if_line)
+            return get_first_if_of_nested_chain(statement.then_statement, target_depth, current_depth + 1, first_if)
     
     elif hasattr(statement, 'statements') and isinstance(statement.statements, list):
         for s in statement.statements:
-            line = get_first_if_line_of_nested_chain(s, target_depth, current_depth, first_if_line)
-            if line is not None:
-                return line
+            first = get_first_if_of_nested_chain(s, target_depth, current_depth, first_if)
+            if first is not None:
+                return first
     elif isinstance(statement, list):
         for s in statement:
-            line = get_first_if_line_of_nested_chain(s, target_depth, current_depth, first_if_line)
-            if line is not None:
-                return line
+            first = get_first_if_of_nested_chain(s, target_depth, current_depth, first_if)
+            if first is not None:
+                return first
 
     return None
 
 
-def detect_nested_if(node, source_lines, filepath, filename):
+@handles(javalang.tree.MethodDeclaration)
+def detect_nested_if(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.MethodDeclaration):
-        max_depth = get_max_if_depth(node.body)
+        max_depth = get_metrics_table(context, source_lines, node).get(node).max_if_depth
         if max_depth >= NESTED_IF_THRESHOLD:
-            # Find the first if statement line in the nested if chain
-            start_line = get_first_if_line_of_nested_chain(node.body, target_depth=NESTED_IF_THRESHOLD)
-            if start_line is None:
+            # Find the first if statement in the nested if chain; the smell
+            # spans it up to the end of its last else branch
+            first_if = get_first_if_of_nested_chain(node.body, target_depth=NESTED_IF_THRESHOLD)
+            spans = get_span_index(context, source_lines)
+            if first_if is not None:
+                start_line = first_if.position.line
+                end_line = spans.end_line(first_if)
+            else:
                 start_line = node.position.line if node.position else 1
-
-            brace_count = 0
-            end_line = start_line
-            for i, line in enumerate(source_lines[start_line-1:], start=start_line):
-                brace_count += line.count('{') - line.count('}')
-                if brace_count <= 0 and '}' in line:
-                    end_line = i
-                    break
+                end_line = spans.end_line(node) if node.position else start_line
 
             return {
                 "codeSmellType": "Nested If Statements",
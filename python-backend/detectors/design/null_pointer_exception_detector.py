@@ -1,7 +1,9 @@
 import javalang
+from ..registry import handles
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_null_pointer_exception(node, source_lines, filepath, filename):
+@handles(javalang.tree.ThrowStatement)
+def detect_null_pointer_exception(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.ThrowStatement):
         expr = node.expression
         if isinstance(expr, javalang.tree.ClassCreator):
@@ -1,7 +1,10 @@
 import javalang
+from ..registry import handles
+from ..spans import get_span_index
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_private_constructors_final(node, source_lines, filepath, filename):
+@handles(javalang.tree.ClassDeclaration)
+def detect_private_constructors_final(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.ClassDeclaration):
         if 'final' in node.modifiers:
             return None
@@ -11,13 +14,7 @@ def detect_private_constructors_final(node, source_lines, filepath, filename):
         all_private = all('private' in c.modifiers for c in constructors)
         if all_private:
             start_line = node.position.line if node.position else 1
-            brace_count = 0
-            end_line = start_line
-            for i, line in enumerate(source_lines[start_line-1:], start=start_line):
-                brace_count += line.count('{') - line.count('}')
-                if brace_count == 0 and '}' in line:
-                    end_line = i
-                    break
+            end_line = get_span_index(context, source_lines).end_line(node) or start_line
             return {
                 "codeSmellType": "Class With Only Private Constructors Should Be Final",
                 "filename": filename,
@@ -1,27 +1,18 @@
 import javalang
+from ..metrics_table import get_metrics_table
+from ..registry import handles
 from ..thresholds import TOO_MANY_FIELDS_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
-def detect_too_many_fields(node, source_lines, filepath, filename):
+@handles(javalang.tree.ClassDeclaration)
+def detect_too_many_fields(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.ClassDeclaration):
-        # Filter: only non-static and non-final fields
-        non_static_non_final_fields = [
-            field for field in node.fields
-            if 'static' not in field.modifiers and 'final' not in field.modifiers
-        ]
+        metrics = get_metrics_table(context, source_lines, node).get(node)
 
-        field_count = len(non_static_non_final_fields)
-        # print(field_count)
+        # Only non-static and non-final fields
+        field_count = metrics.mutable_fields
         if field_count > TOO_MANY_FIELDS_THRESHOLD:
-            start_line = node.position.line if node.position else 1
-            brace_count = 0
-            end_line = start_line
-
-            # Bracket matching to find class end
-            for i, line in enumerate(source_lines[start_line - 1:], start=start_line):
-                brace_count += line.count('{') - line.count('}')
-                if brace_count == 0 and '}' in line:
-                    end_line = i
-                    break
+            start_line = metrics.start_line or 1
+            end_line = metrics.end_line or start_line
 
             return {
                 "codeSmellType": "Too Many Fields",
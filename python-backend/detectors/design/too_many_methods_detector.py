@@ -1,55 +1,19 @@
 import javalang
+from ..metrics_table import get_metrics_table
+from ..registry import handles
 from ..thresholds import TOO_MANY_METHODS_THRESHOLD, SMELL_CATEGORY_WEIGHTS
 
-def is_getter(method):
-    return (
-        (method.name.startswith('get') or method.name.startswith('is'))
-        and len(method.parameters) == 0
-        and method.return_type
-        and method.return_type.name != 'void'
-    )
-
-def is_setter(method):
-    return (
-        method.name.startswith('set')
-        and len(method.parameters) == 1
-        and method.return_type
-        and method.return_type.name == 'void'
-    )
-
-def detect_too_many_methods(node, source_lines, filepath, filename):
+@handles(javalang.tree.ClassDeclaration)
+def detect_too_many_methods(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.ClassDeclaration):
-        non_getter_setter_methods = [
-            method for method in node.methods
-            if not (is_getter(method) or is_setter(method))
-        ]
+        metrics = get_metrics_table(context, source_lines, node).get(node)
 
-        method_count = len(non_getter_setter_methods)
-      
+        # Getters and setters don't count
+        method_count = metrics.methods - metrics.accessor_methods
 
         if method_count > TOO_MANY_METHODS_THRESHOLD:
-            start_line = node.position.line if node.position else 1
-
-            # Find the actual starting line of the class body (where the first '{' is)
-            body_start_line = -1
-            for i in range(start_line - 1, len(source_lines)):
-                if '{' in source_lines[i]:
-                    body_start_line = i + 1  # Convert index to line number
-                    break
-
-            if body_start_line == -1:
-                body_start_line = start_line  # fallback
-
-            # Begin brace counting from the body start
-            brace_count = 0
-            end_line = body_start_line
-
-            for i in range(body_start_line - 1, len(source_lines)):
-                line = source_lines[i]
-                brace_count += line.count('{') - line.count('}')
-                if brace_count == 0:
-                    end_line = i + 1  # Convert index to line number
-                    break
+            start_line = metrics.start_line or 1
+            end_line = metrics.end_line or start_line
 
             return {
                 "codeSmellType": "Too Many Methods",
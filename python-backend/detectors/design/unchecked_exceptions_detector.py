@@ -1,7 +1,10 @@
 import javalang
+from ..registry import handles
+from ..spans import get_span_index
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_unchecked_exceptions(node, source_lines, filepath, filename):
+@handles(javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)
+def detect_unchecked_exceptions(node, source_lines, filepath, filename, context=None):
     if isinstance(node, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
         if node.throws:
             unchecked_exceptions = {'RuntimeException', 'Error'}
@@ -9,13 +12,7 @@ def detect_unchecked_exceptions(node, source_lines, filepath, filename):
                 exception_name = exception.name if isinstance(exception, javalang.tree.ReferenceType) else exception
                 if exception_name in unchecked_exceptions:
                     start_line = node.position.line if node.position else 1
-                    brace_count = 0
-                    end_line = start_line
-                    for i, line in enumerate(source_lines[start_line-1:], start=start_line):
-                        brace_count += line.count('{') - line.count('}')
-                        if brace_count == 0 and '}' in line:
-                            end_line = i
-                            break
+                    end_line = get_span_index(context, source_lines).end_line(node) or start_line
                     return {
                         "codeSmellType": "Unchecked Exceptions In Signatures",
                         "filename": filename,
@@ -1,7 +1,10 @@
 import javalang
+from ..registry import handles
+from ..spans import get_span_index
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
-def detect_utility_class(node, source_lines, filepath, filename):
+@handles(javalang.tree.ClassDeclaration)
+def detect_utility_class(node, source_lines, filepath, filename, context=None):
     if isinstance(node, javalang.tree.ClassDeclaration):
         if node.modifiers and 'abstract' in node.modifiers:
             return None
@@ -15,13 +18,7 @@ def detect_utility_class(node, source_lines, filepath, filename):
         )
         if all_static and (not node.constructors or has_non_private_constructor):
             start_line = node.position.line if node.position else 1
-            brace_count = 0
-            end_line = start_line
-            for i, line in enumerate(source_lines[start_line-1:], start=start_line):
-                brace_count += line.count('{') - line.count('}')
-                if brace_count == 0 and '}' in line:
-                    end_line = i
-                    break
+            end_line = get_span_index(context, source_lines).end_line(node) or start_line
             return {
                 "codeSmellType": "Utility Class",
                 "filename": filename,
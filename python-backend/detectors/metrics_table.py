@@ -0,0 +1,269 @@
+"""
+Method and Type Metrics Table
+
+Structural metrics of every method, constructor and type declaration of a
+file, filled in one post-order pass over its AST: cyclomatic complexity,
+if nesting depth, switch case counts, parameters, fields, static and
+instance methods and line spans. Subtree values (decision points, nesting
+depth) are summed up from the children as each node is left, so no
+subtree is walked twice; a type's complexity (WMC) is the sum of its own
+methods' values once the type is left.
+
+The threshold detectors look their node up in the file's table instead of
+walking the node again, and the API returns the table on request.
+"""
+
+import javalang
+from javalang.ast import Node
+
+from .spans import get_span_index
+
+# Bump when the table's contents change, to invalidate cached tables
+TABLE_VERSION = 2
+
+# Statements and expressions adding a path through a method (McCabe)
+DECISION_TYPES = (
+    javalang.tree.IfStatement,
+    javalang.tree.ForStatement,
+    javalang.tree.WhileStatement,
+    javalang.tree.DoStatement,
+    javalang.tree.SwitchStatement,
+    javalang.tree.TernaryExpression,
+)
+LOGICAL_OPERATORS = ('&&', '||')
+
+METHOD_TYPES = (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)
+
+
+def is_getter(method):
+    return (
+        (method.name.startswith('get') or method.name.startswith('is'))
+        and len(method.parameters) == 0
+        and method.return_type
+        and method.return_type.name != 'void'
+    )
+
+
+def is_setter(method):
+    return (
+        method.name.startswith('set')
+        and len(method.parameters) == 1
+        and method.return_type
+        and method.return_type.name == 'void'
+    )
+
+
+def switch_case_count(switch):
+    """Case labels of a switch statement; 'default' counts as one"""
+    total_cases = 0
+    for case_group in switch.cases:
+        if case_group is not None and hasattr(case_group, 'case'):
+            if case_group.case is None:
+                total_cases += 1
+            elif isinstance(case_group.case, list):
+                total_cases += len(case_group.case)
+            else:
+                total_cases += 1
+    return total_cases
+
+
+def _is_decision(node):
+    return isinstance(node, DECISION_TYPES) or (
+        isinstance(node, javalang.tree.BinaryOperation) and node.operator in LOGICAL_OPERATORS
+    )
+
+
+def _members(node):
+    """Body declarations of a type; enums keep theirs after the constants"""
+    body = node.body
+    if isinstance(body, javalang.tree.EnumBody):
+        return body.declarations or []
+    return body or []
+
+
+class MethodMetrics:
+    """Metrics of one method or constructor"""
+
+    __slots__ = ("name", "kind", "type_name", "start_line", "end_line", "parameters", "is_static",
+                 "is_accessor", "cyclomatic_complexity", "max_if_depth", "switches")
+
+    def __init__(self, node, type_name, spans):
+        self.name = node.name
+        self.kind = "method" if isinstance(node, javalang.tree.MethodDeclaration) else "constructor"
+        self.type_name = type_name
+        self.start_line = node.position.line if node.position else None
+        self.end_line = spans.end_line(node)
+        self.parameters = len(node.parameters)
+        self.is_static = 'static' in node.modifiers
+        self.is_accessor = self.kind == "method" and bool(is_getter(node) or is_setter(node))
+        # Filled in when the pass leaves the method
+        self.cyclomatic_complexity = 1
+        self.max_if_depth = 0
+        # (start line, end line, case labels) of every switch, in source order
+        self.switches = []
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "type": self.type_name,
+            "startLine": self.start_line,
+            "endLine": self.end_line,
+            "parameters": self.parameters,
+            "static": self.is_static,
+            "cyclomaticComplexity": self.cyclomatic_complexity,
+            "maxIfDepth": self.max_if_depth,
+            "switchCases": [cases for _, _, cases in self.switches],
+        }
+
+
+class TypeMetrics:
+    """Metrics of one class, interface or enum, from its own members"""
+
+    __slots__ = ("name", "kind", "start_line", "end_line", "fields", "mutable_fields",
+                 "static_methods", "instance_methods", "accessor_methods", "constructors", "complexity")
+
+    def __init__(self, node, spans):
+        self.name = node.name
+        self.kind = type(node).__name__[:-len("Declaration")].lower()
+        self.start_line = node.position.line if node.position else None
+        self.end_line = spans.end_line(node)
+
+        members = _members(node)
+        fields = [m for m in members if isinstance(m, javalang.tree.FieldDeclaration)]
+        methods = [m for m in members if isinstance(m, javalang.tree.MethodDeclaration)]
+        self.fields = len(fields)
+        # Neither static nor final
+        self.mutable_fields = sum(
+            1 for field in fields if 'static' not in field.modifiers and 'final' not in field.modifiers)
+        self.static_methods = sum(1 for method in methods if 'static' in method.modifiers)
+        self.instance_methods = len(methods) - self.static_methods
+        self.accessor_methods = sum(1 for method in methods if is_getter(method) or is_setter(method))
+        self.constructors = sum(1 for m in members if isinstance(m, javalang.tree.ConstructorDeclaration))
+        # Weighted methods per class: cyclomatic complexity summed over its
+        # own methods and constructors, filled in when the pass leaves the type
+        self.complexity = 0
+
+    @property
+    def methods(self):
+        return self.static_methods + self.instance_methods
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "startLine": self.start_line,
+            "endLine": self.end_line,
+            "fields": self.fields,
+            "mutableFields": self.mutable_fields,
+            "staticMethods": self.static_methods,
+            "instanceMethods": self.instance_methods,
+            "accessorMethods": self.accessor_methods,
+            "constructors": self.constructors,
+            "complexity": self.complexity,
+        }
+
+
+class MetricsTable:
+    """Metrics of every method, constructor and type declaration under root"""
+
+    def __init__(self, root, spans):
+        # Keeps the nodes alive, so their ids stay valid keys
+        self.root = root
+        self.methods = []  # MethodMetrics in source order
+        self.types = []  # TypeMetrics in source order
+        self._records = {}  # id(node) -> MethodMetrics / TypeMetrics
+        self._build(root, spans)
+
+    def get(self, node):
+        """MethodMetrics of a method or constructor, TypeMetrics of a type, else None"""
+        return self._records.get(id(node))
+
+    def to_dict(self):
+        return {
+            "types": [record.to_dict() for record in self.types],
+            "methods": [record.to_dict() for record in self.methods],
+        }
+
+    def _build(self, root, spans):
+        # Same pre-order as javalang.ast.walk_tree; a node is pushed again
+        # with exiting=True so it is finished after its whole subtree
+        stack = [(root, False)]
+        decisions = [0]  # decision points found so far under each open node
+        depths = {}  # id(node) -> if nesting depth below it, when not 0
+        open_methods = []
+        open_types = []
+
+        while stack:
+            item, exiting = stack.pop()
+            if exiting:
+                count = decisions.pop() + _is_decision(item)
+                decisions[-1] += count
+
+                if isinstance(item, javalang.tree.IfStatement):
+                    # Depth counts through the then branch only
+                    depths[id(item)] = 1 + _depth(item.then_statement, depths)
+                elif isinstance(getattr(item, 'statements', None), list):
+                    depth = _depth(item.statements, depths)
+                    if depth:
+                        depths[id(item)] = depth
+
+                if isinstance(item, METHOD_TYPES):
+                    record = open_methods.pop()
+                    record.cyclomatic_complexity = 1 + count
+                    record.max_if_depth = _depth(item.body, depths)
+                elif isinstance(item, javalang.tree.TypeDeclaration):
+                    # Member classes count on their own; local and anonymous
+                    # classes are already part of the method declaring them
+                    open_types.pop().complexity = sum(
+                        self._records[id(member)].cyclomatic_complexity
+                        for member in _members(item) if isinstance(member, METHOD_TYPES))
+                continue
+
+            if isinstance(item, Node):
+                if isinstance(item, METHOD_TYPES):
+                    record = MethodMetrics(item, open_types[-1].name if open_types else None, spans)
+                    self.methods.append(record)
+                    self._records[id(item)] = record
+                    open_methods.append(record)
+                elif isinstance(item, javalang.tree.TypeDeclaration):
+                    record = TypeMetrics(item, spans)
+                    self.types.append(record)
+                    self._records[id(item)] = record
+                    open_types.append(record)
+                elif isinstance(item, javalang.tree.SwitchStatement):
+                    # Also part of the methods enclosing a local or anonymous class
+                    switch = (item.position.line if item.position else None,
+                              spans.end_line(item), switch_case_count(item))
+                    for record in open_methods:
+                        record.switches.append(switch)
+
+                stack.append((item, True))
+                decisions.append(0)
+                children = item.children
+            else:
+                children = item
+            for child in reversed(children):
+                if isinstance(child, (Node, list, tuple)):
+                    stack.append((child, False))
+
+
+def _depth(statement, depths):
+    """If nesting depth of a statement (or list of statements) already left by the pass"""
+    if statement is None:
+        return 0
+    if isinstance(statement, list):
+        return max((_depth(s, depths) for s in statement), default=0)
+    return depths.get(id(statement), 0)
+
+
+def get_metrics_table(context, source_lines, root):
+    """
+    Metrics table of the file being analyzed, built on first use; without
+    a context, a table of root alone.
+    """
+    if context is not None:
+        if context.metrics_table is None:
+            context.metrics_table = MetricsTable(context.tree, context.spans)
+        return context.metrics_table
+    return MetricsTable(root, get_span_index(None, source_lines))
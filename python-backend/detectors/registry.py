@@ -0,0 +1,156 @@
+"""
+Detector Registry
+
+Maps javalang node types to the detectors that handle them, so a file is
+analyzed with one walk over its AST and each node only reaches the
+detectors that declared its type.
+
+The walk can also track where it is (see Ancestry): the nodes enclosing
+the one being visited, and the guard calls in scope there, so detectors
+don't need parent links that javalang nodes don't have.
+"""
+
+import javalang
+from javalang.ast import Node
+
+
+def handles(*node_types):
+    """
+    Declare the javalang node types a detector handles.
+
+    Usage:
+        @handles(javalang.tree.MethodDeclaration)
+        def detect_something(node, source_lines, filepath, filename):
+            ...
+    """
+    def decorator(detector):
+        detector.node_types = node_types
+        return detector
+    return decorator
+
+
+def _node_classes():
+    """All concrete javalang AST node classes"""
+    return [
+        value for value in vars(javalang.tree).values()
+        if isinstance(value, type) and issubclass(value, Node)
+    ]
+
+
+class DispatchTable:
+    """Type -> handlers table, built once for a list of detectors"""
+
+    def __init__(self, detectors):
+        self.detectors = list(detectors)
+        for detector in self.detectors:
+            if not getattr(detector, 'node_types', None):
+                raise ValueError(f"Detector {detector.__name__} does not declare its node types")
+
+        # Detector order is kept per type so output order matches the
+        # order of the detector list.
+        self.table = {}
+        for node_class in _node_classes():
+            handlers = self._match(node_class)
+            if handlers:
+                self.table[node_class] = handlers
+
+    def _match(self, node_class):
+        return tuple(
+            detector for detector in self.detectors
+            if issubclass(node_class, detector.node_types)
+        )
+
+    def handlers_for(self, node_class):
+        handlers = self.table.get(node_class)
+        if handlers is None:
+            # Node classes defined outside javalang.tree (subclasses etc.)
+            handlers = self._match(node_class)
+            self.table[node_class] = handlers
+        return handlers
+
+
+def _guard_calls(condition):
+    """Names of the methods an if condition calls, except negated calls"""
+    return frozenset(
+        node.member for node in walk_nodes(condition)
+        if isinstance(node, javalang.tree.MethodInvocation) and '!' not in (node.prefix_operators or ())
+    )
+
+
+class Ancestry:
+    """
+    Position of a walk_nodes walk: the nodes enclosing the node being
+    visited, outermost first, and guard_calls, the methods called in the
+    conditions of the enclosing ifs whose then branch holds the node.
+    Guard calls are computed once per if statement and kept per level, so
+    reading them is constant time.
+    """
+
+    __slots__ = ("nodes", "guard_calls")
+
+    def __init__(self):
+        self.nodes = []
+        self.guard_calls = frozenset()
+
+    def parent(self):
+        return self.nodes[-1] if self.nodes else None
+
+    def enclosing(self, *node_types):
+        """Innermost enclosing node of one of node_types, or None"""
+        for node in reversed(self.nodes):
+            if isinstance(node, node_types):
+                return node
+        return None
+
+
+def walk_nodes(root, ancestry=None):
+    """
+    Pre-order walk over an AST, yielding nodes in the same order as
+    javalang.ast.walk_tree but without building a path tuple per node.
+    With an Ancestry, it describes the position of each node while the
+    node is being yielded.
+    """
+    if ancestry is not None:
+        yield from _walk_with_ancestry(root, ancestry)
+        return
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Node):
+            yield item
+            children = item.children
+        else:
+            children = item
+        for child in reversed(children):
+            if isinstance(child, (Node, list, tuple)):
+                stack.append(child)
+
+
+def _walk_with_ancestry(root, ancestry):
+    nodes = ancestry.nodes
+    del nodes[:]
+    # (item, enclosing node count, guard calls in scope)
+    stack = [(root, 0, frozenset())]
+    while stack:
+        item, depth, guards = stack.pop()
+        if isinstance(item, Node):
+            # Drop the nodes whose subtrees the walk has left
+            del nodes[depth:]
+            ancestry.guard_calls = guards
+            yield item
+            nodes.append(item)
+            depth += 1
+            children = item.children
+            if isinstance(item, javalang.tree.IfStatement) and item.then_statement is not None:
+                then_guards = guards | _guard_calls(item.condition)
+                for child in reversed(children):
+                    if isinstance(child, (Node, list, tuple)):
+                        stack.append((child, depth, then_guards if child is item.then_statement else guards))
+                continue
+        else:
+            children = item
+        for child in reversed(children):
+            if isinstance(child, (Node, list, tuple)):
+                stack.append((child, depth, guards))
+    del nodes[:]
+    ancestry.guard_calls = frozenset()
@@ -0,0 +1,122 @@
+"""
+Classifier Inference Backends
+
+Loads a sequence classification model for one of the backends selected by
+INFERENCE_BACKEND:
+
+- pytorch:   the fp32 model as trained (default), on GPU when available
+- quantized: dynamic int8 quantization of the model's Linear layers (CPU)
+- onnx:      the model exported to ONNX and run with ONNX Runtime (CPU);
+             needs the optional onnxruntime package, falls back to pytorch
+             without it
+
+Every backend returns a callable taking the tokenizer's tensors as keyword
+arguments and returning an object with a .logits tensor, so callers don't
+depend on the backend in use.
+"""
+
+import logging
+import os
+import tempfile
+from types import SimpleNamespace
+
+import torch
+from transformers import AutoModelForSequenceClassification
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+
+def load_classifier(model_path, backend="pytorch", export_dir=None, model_id=None):
+    """
+    Load the model at model_path for the given backend.
+
+    Args:
+        model_path: Local directory of the Hugging Face model
+        backend: One of BACKENDS
+        export_dir: Where ONNX exports are kept (onnx backend only)
+        model_id: Version of the model files, part of the export file name
+
+    Returns:
+        (model, device) - the tokenizer's inputs must be moved to device
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+    model.eval()
+
+    if backend == "onnx":
+        try:
+            import onnxruntime
+        except ImportError:
+            logger.warning("onnxruntime is not installed, using the pytorch backend for %s", model_path)
+            backend = "pytorch"
+        else:
+            return _load_onnx(onnxruntime, model, model_path, export_dir, model_id), torch.device("cpu")
+
+    if backend == "quantized":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, torch.device("cpu")
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model.to(device)
+    return model, device
+
+
+class OnnxClassifier:
+    """ONNX Runtime session with the calling convention of the PyTorch model"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_names = [model_input.name for model_input in session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feeds = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def _load_onnx(onnxruntime, model, model_path, export_dir, model_id):
+    export_dir = export_dir or os.path.join(model_path, "onnx")
+    name = os.path.basename(os.path.normpath(model_path))
+    onnx_path = os.path.join(export_dir, f"{name}-{model_id or 'model'}.onnx")
+
+    if not os.path.exists(onnx_path):
+        logger.info("Exporting %s to ONNX at %s", model_path, onnx_path)
+        export_onnx(model, onnx_path)
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+    return OnnxClassifier(session)
+
+
+def export_onnx(model, onnx_path, opset_version=14):
+    """Export with dynamic batch and sequence axes; written atomically"""
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    sample = torch.ones((1, 8), dtype=torch.long)
+    # A temp file of its own, so worker processes exporting the same model
+    # at once never write to or remove each other's partial export
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(onnx_path), suffix=".onnx.tmp")
+    os.close(fd)
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample, sample),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=opset_version,
+            )
+        os.replace(tmp_path, onnx_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,98 @@
+"""
+Complex Method Cascade
+
+A cheap first stage in front of the Complex Method transformer. A logistic
+regression over structural metrics of the method (lines, cyclomatic
+complexity, if nesting depth, parameters, external calls) scores how
+likely the transformer is to flag it; methods scoring below the calibrated
+cutoff are reported clean without a forward pass, the rest go on to the
+model as before.
+
+The classifier is trained and its cutoff chosen for a target recall by
+tools/calibrate_cascade.py, which writes a small JSON file of coefficients.
+Scoring it needs no scikit-learn at runtime. Without the file the cascade
+is off and every method reaches the transformer.
+"""
+
+import json
+import math
+
+import javalang
+
+from ..design.cyclomatic_complexity_detector import cyclomatic_complexity
+from ..design.nested_if_detector import get_max_if_depth
+from .feature_envy_preprocessor import find_external_calls
+
+FEATURES = ("loc", "cyclomatic_complexity", "nesting_depth", "parameters", "external_calls")
+
+# Bump when method_features changes, so old calibration files are rejected
+FEATURES_VERSION = 1
+
+
+def method_features(method, code_snippet, metrics=None):
+    """
+    Structural metrics of a MethodDeclaration, in FEATURES order; complexity
+    and nesting come from its MethodMetrics when the file's table is at hand.
+    """
+    external_calls = find_external_calls(method)
+    return [
+        code_snippet.count('\n') + 1,
+        metrics.cyclomatic_complexity if metrics else cyclomatic_complexity(method),
+        metrics.max_if_depth if metrics else get_max_if_depth(method.body),
+        len(method.parameters),
+        sum(len(members) for members in external_calls.values()),
+    ]
+
+
+def snippet_method(code_snippet):
+    """Parse a method's source on its own; returns its MethodDeclaration or None"""
+    try:
+        tree = javalang.parse.parse("class CascadeSnippet {\n" + code_snippet + "\n}")
+    except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+        return None
+    for _, method in tree.filter(javalang.tree.MethodDeclaration):
+        return method
+    return None
+
+
+def transform(features):
+    # Counts are heavy tailed; log1p keeps giant methods from dominating
+    return [math.log1p(value) for value in features]
+
+
+class Cascade:
+    def __init__(self, coef, intercept, cutoff, **info):
+        self.coef = list(coef)
+        self.intercept = intercept
+        self.cutoff = cutoff
+        self.info = info
+
+    def score(self, features):
+        """Probability that the transformer flags the method"""
+        z = self.intercept + sum(w * x for w, x in zip(self.coef, transform(features)))
+        return 1.0 / (1.0 + math.exp(-z)) if z > -700 else 0.0
+
+    def skips(self, features):
+        """True when the method is confidently clean and the model can be skipped"""
+        return self.score(features) < self.cutoff
+
+    def to_dict(self):
+        return dict(self.info, features=list(FEATURES), features_version=FEATURES_VERSION,
+                    coef=self.coef, intercept=self.intercept, cutoff=self.cutoff)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+            handle.write('\n')
+
+
+def load_cascade(path):
+    """Cascade stored at path, or None if there is none (or it is for other features)"""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return None
+    if data.pop("features_version", None) != FEATURES_VERSION or data.pop("features", None) != list(FEATURES):
+        raise ValueError(f"{path} was calibrated for different features; recalibrate it")
+    return Cascade(**data)
@@ -0,0 +1,241 @@
+"""
+Cross-Request Inference Coalescing
+
+The Flask server handles uploads on concurrent threads. Left alone, each
+thread would run the model itself: torch's intra-op pools fight for the
+same cores and every request runs its own small, badly filled batches.
+
+Instead each model gets one inference thread with a queue. Requests put
+their snippets on it and block; the thread takes the first waiting request,
+lets others join for up to INFERENCE_COALESCE_WAIT_MS or until
+INFERENCE_COALESCE_MAX_SAMPLES snippets are pending, runs them as one call
+(which plans length-bucketed batches and consults the prediction cache)
+and hands each request back its own slice of the predictions. A request is
+never split, so one larger than the limit runs on its own.
+
+The inference threads are the only callers of the model and own the torch
+thread settings (INFERENCE_THREADS); other work that must run where the
+model runs, like the startup warm-up, is handed to them with call().
+
+An error from the model (any BaseException) is raised in the requests of
+its batch. If an inference thread dies anyway, its waiting requests fail
+instead of hanging, and the next request starts a new thread.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from config import (
+    INFERENCE_COALESCE,
+    INFERENCE_COALESCE_MAX_SAMPLES,
+    INFERENCE_COALESCE_WAIT_MS,
+    INFERENCE_THREADS,
+)
+from metrics import COALESCED_REQUESTS, COALESCE_WAIT_SECONDS, INFERENCE_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting request checks that its inference thread is alive
+WAIT_CHECK_SECONDS = 1.0
+
+_workers = {}  # model name -> CoalescingWorker
+_lock = threading.Lock()
+_torch_configured = False
+
+
+class _Request:
+    __slots__ = ("texts", "predict", "call", "enqueued", "done", "result", "error")
+
+    def __init__(self, texts, predict=None, call=None):
+        self.texts = texts
+        self.predict = predict
+        self.call = call
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CoalescingWorker:
+    """Inference thread for one model, batching snippets across requests"""
+
+    def __init__(self, name, max_samples=INFERENCE_COALESCE_MAX_SAMPLES,
+                 max_wait=INFERENCE_COALESCE_WAIT_MS / 1000.0):
+        self.name = name
+        self.max_samples = max_samples
+        self.max_wait = max_wait
+        self.pid = os.getpid()
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._error = None  # what stopped the thread, once it has died
+        self._thread = threading.Thread(target=self._run, name=f"inference-{name}", daemon=True)
+        self._thread.start()
+
+    def predict(self, predict, texts):
+        """predict(texts) for texts, in order; blocks until their batch has run"""
+        texts = list(texts)
+        if not texts:
+            return []
+        self._add_pending(len(texts))
+        return self._wait(_Request(texts, predict=predict))
+
+    def call(self, fn):
+        """fn() run on the inference thread between batches; returns its result"""
+        return self._wait(_Request([], call=fn))
+
+    def _wait(self, request):
+        self._queue.put(request)
+        while not request.done.wait(WAIT_CHECK_SECONDS):
+            if not self.alive():
+                # Nothing reads the queue any more
+                self._fail_pending(self._error or RuntimeError(f"The {self.name} inference thread has stopped"))
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def depth(self):
+        """Snippets queued or running"""
+        return self._pending
+
+    def alive(self):
+        return self._thread.is_alive()
+
+    def _add_pending(self, count):
+        with self._pending_lock:
+            self._pending += count
+            INFERENCE_QUEUE_DEPTH.set(self._pending, model=self.name)
+
+    def _run(self):
+        batch, carry = [], None
+        try:
+            _configure_torch()
+            while True:
+                first = carry if carry is not None else self._queue.get()
+                carry = None
+                batch = [first]
+                if first.call is not None:
+                    self._run_call(first)
+                    continue
+                size = len(first.texts)
+                deadline = time.perf_counter() + self.max_wait
+                while size < self.max_samples:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if request.call is not None or size + len(request.texts) > self.max_samples:
+                        # Starts the next batch instead of overfilling this one
+                        carry = request
+                        break
+                    batch.append(request)
+                    size += len(request.texts)
+                self._run_batch(batch, size)
+        except BaseException as e:
+            # Nothing may be left waiting on a thread that is going away
+            logger.exception("The %s inference thread stopped", self.name)
+            self._error = e
+            for request in batch + ([carry] if carry is not None else []):
+                if not request.done.is_set():
+                    self._fail(request, e)
+            self._fail_pending(e)
+
+    def _fail(self, request, error):
+        request.error = error
+        self._add_pending(-len(request.texts))
+        request.done.set()
+
+    def _fail_pending(self, error):
+        """Fail the requests left on the queue of a stopped thread"""
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._fail(request, error)
+
+    def _run_call(self, request):
+        try:
+            request.result = request.call()
+        except BaseException as e:
+            request.error = e
+        finally:
+            request.done.set()
+
+    def _run_batch(self, batch, size):
+        started = time.perf_counter()
+        for request in batch:
+            COALESCE_WAIT_SECONDS.observe(started - request.enqueued, model=self.name)
+        COALESCED_REQUESTS.observe(len(batch), model=self.name)
+
+        texts = [text for request in batch for text in request.texts]
+        try:
+            predictions = batch[0].predict(texts)
+        except BaseException as e:
+            for request in batch:
+                request.error = e
+        else:
+            offset = 0
+            for request in batch:
+                request.result = predictions[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+        finally:
+            self._add_pending(-size)
+            for request in batch:
+                request.done.set()
+
+
+def _configure_torch():
+    """Apply INFERENCE_THREADS once per process, from the first inference thread"""
+    global _torch_configured
+    with _lock:
+        if _torch_configured:
+            return
+        _torch_configured = True
+    if INFERENCE_THREADS > 0:
+        import torch
+        torch.set_num_threads(INFERENCE_THREADS)
+
+
+def get_worker(name):
+    """The inference thread for name in this process, started on first use"""
+    with _lock:
+        worker = _workers.get(name)
+        # A forked child inherits the dict but not the thread; a thread that
+        # died is replaced
+        if worker is None or worker.pid != os.getpid() or not worker.alive():
+            worker = _workers[name] = CoalescingWorker(name)
+        return worker
+
+
+def predict(name, predict_fn, texts):
+    """
+    Run predict_fn(texts) on the model's inference thread, coalesced with
+    concurrent requests (or on the calling thread with INFERENCE_COALESCE off).
+    """
+    if not INFERENCE_COALESCE:
+        return predict_fn(texts)
+    return get_worker(name).predict(predict_fn, texts)
+
+
+def call(name, fn):
+    """fn() on the model's inference thread (on the calling thread with INFERENCE_COALESCE off)"""
+    if not INFERENCE_COALESCE:
+        _configure_torch()
+        return fn()
+    return get_worker(name).call(fn)
+
+
+def status():
+    """{model name: {"queueDepth", "alive"}} for the inference threads of this process"""
+    with _lock:
+        return {
+            name: {"queueDepth": worker.depth(), "alive": worker.alive()}
+            for name, worker in _workers.items() if worker.pid == os.getpid()
+        }
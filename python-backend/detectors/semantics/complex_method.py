@@ -1,30 +1,41 @@
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import javalang
 import os
+from config import (
+    INFERENCE_BACKEND,
+    COMPLEX_METHOD_BATCH_SIZE,
+    COMPLEX_METHOD_MAX_BATCH_TOKENS,
+    COMPLEX_METHOD_CASCADE_PATH,
+)
+from metrics import CASCADE_DECISIONS
+from result_cache import fingerprint
+from ..metrics_table import get_metrics_table
+from ..registry import handles
+from . import coalescer, inference, models
+from .cascade import load_cascade, method_features
+from ..spans import get_span_index
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
 # Get the directory of the current file
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 
-# Load model from local directory
+# Model directory; loaded by the registry on first use
 model_path = os.path.join(project_root, "complex-method")
 # Use feature-envy tokenizer since complex-method doesn't have tokenizer files
+# (the registry shares the one instance with the Feature Envy model)
 tokenizer_path = os.path.join(project_root, "feature-envy")
+spec = models.register(
+    "complex_method", model_path, tokenizer_path,
+    max_batch_size=COMPLEX_METHOD_BATCH_SIZE, max_batch_tokens=COMPLEX_METHOD_MAX_BATCH_TOKENS,
+)
 
-try:
-    # Load tokenizer and model from local paths
-    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, local_files_only=True)
-    model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
-except Exception as e:
-    print(f"Error loading models: {e}")
-    raise
+# Predictions are cached per snippet for this exact model, tokenizer and backend
+prediction_cache = inference.PredictionCache("complex_method", fingerprint(spec.model_id, INFERENCE_BACKEND))
 
-# Optimization: Set model to eval mode and use GPU if available
-model.eval()
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
+# Optional metric-based first stage that skips the model for clearly clean methods
+cascade_path = COMPLEX_METHOD_CASCADE_PATH
+cascade = load_cascade(cascade_path) if cascade_path else None
 
 
 def detect_complex_method_batch(code_samples):
@@ -37,33 +48,38 @@ def detect_complex_method_batch(code_samples):
     Returns:
         List of booleans - True if Complex Method detected for each sample
     """
-    if not code_samples:
-        return []
-    
-    # Batch tokenization
-    inputs = tokenizer(
-        code_samples, 
-        truncation=True, 
-        max_length=512, 
-        padding=True, 
-        return_tensors="pt"
-    )
-    
-    # Move inputs to device
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-    
-    predictions = torch.argmax(outputs.logits, dim=1).tolist()
+    # Runs on the model's inference thread, batched with concurrent requests
+    predictions = coalescer.predict("complex_method", _predict_labels, code_samples)
     return [pred == 1 for pred in predictions]
 
 
+def _predict_labels(code_samples):
+    # Length-bucketed batches capped by sample count and padded token count
+    loaded = models.get("complex_method")
+    return inference.predict_labels(
+        "complex_method", loaded.tokenizer, loaded.model, loaded.device, code_samples,
+        max_batch_size=COMPLEX_METHOD_BATCH_SIZE,
+        max_batch_tokens=COMPLEX_METHOD_MAX_BATCH_TOKENS,
+        cache=prediction_cache,
+    )
+
+
+inference.register_predictor("complex_method", detect_complex_method_batch)
+
+
 def detect_complex_method(code):
     results = detect_complex_method_batch([code])
     return results[0] if results else False
 
-def extract_method_code(source_lines, start_line):
+def extract_method_code(source_lines, start_line, end_line=None):
+    """
+    Source of the method starting at start_line. With end_line (from the
+    file's SpanIndex) the lines are sliced directly; otherwise braces are
+    counted line by line.
+    """
+    if end_line is not None:
+        return "\n".join(source_lines[start_line - 1:end_line])
+
     code = []
     brace_count = 0
     started = False
@@ -82,50 +98,83 @@ def extract_method_code(source_lines, start_line):
     return "\n".join(code)
 
 
-def detect_complex_method_smell(node, source_lines, filepath, filename):
-    """Process individual method nodes (backwards compatible)"""
-    import javalang.tree
-
+def needs_model(method, code_snippet, metrics=None):
+    """False when the cascade is confident the method is clean"""
+    if cascade is None:
+        return True
+    if cascade.skips(method_features(method, code_snippet, metrics)):
+        CASCADE_DECISIONS.inc(model="complex_method", decision="skipped")
+        return False
+    CASCADE_DECISIONS.inc(model="complex_method", decision="model")
+    return True
+
+
+def _complex_method_smell(filename, filepath, start_line, code_snippet):
+    return {
+        "codeSmellType": "Complex Method",
+        "filename": filename,
+        "filepath": filepath,
+        "startline": start_line,
+        "endline": start_line + code_snippet.count('\n'),
+        "code": "CM",
+        "category": "Sematic Based",
+        "weight": SMELL_CATEGORY_WEIGHTS.get("Complex Method", 3)
+    }
+
+
+@handles(javalang.tree.MethodDeclaration)
+def detect_complex_method_smell(node, source_lines, filepath, filename, context=None):
+    """
+    Process individual method nodes. When the file context carries an
+    inference queue the snippet is queued and a placeholder returned, so
+    methods from the whole project are classified in shared batches.
+    """
     if isinstance(node, javalang.tree.MethodDeclaration) and node.position:
         # Skip main method
         if node.name == "main":
             return None
 
         start_line = node.position.line
-        code_snippet = extract_method_code(source_lines, start_line)
+        end_line = get_span_index(context, source_lines).end_line(node)
+        code_snippet = extract_method_code(source_lines, start_line, end_line)
+
+        if cascade is not None and not needs_model(
+                node, code_snippet, get_metrics_table(context, source_lines, node).get(node)):
+            return None
+
+        queue = getattr(context, "inference", None)
+        if queue is not None:
+            return queue.submit(
+                "complex_method", code_snippet,
+                lambda is_complex: _complex_method_smell(filename, filepath, start_line, code_snippet) if is_complex else None,
+                detector=detect_complex_method_smell.__name__,
+            )
 
         if detect_complex_method(code_snippet):
-            return {
-                "codeSmellType": "Complex Method",
-                "filename": filename,
-                "filepath": filepath,
-                "startline": start_line,
-                "endline": start_line + code_snippet.count('\n'),
-                "code": "CM",
-                "category": "Sematic Based",
-                "weight": SMELL_CATEGORY_WEIGHTS.get("Complex Method", 3)
-            }
+            return _complex_method_smell(filename, filepath, start_line, code_snippet)
 
     return None
 
 
-def detect_complex_method_smell_batch(node, source_lines, filepath, filename):
+def detect_complex_method_smell_batch(node, source_lines, filepath, filename, context=None):
     """
     Batch process all methods in a CompilationUnit for Complex Method smell.
     Call this at CompilationUnit level for better performance.
     """
-    import javalang.tree
-
     # Only process at CompilationUnit level
     if not isinstance(node, javalang.tree.CompilationUnit):
         return []
     
+    spans = get_span_index(context, source_lines)
+    
     # Collect all methods
     methods_data = []
     for path, method_node in node.filter(javalang.tree.MethodDeclaration):
         if method_node.position and method_node.name != "main":
             start_line = method_node.position.line
-            code_snippet = extract_method_code(source_lines, start_line)
+            code_snippet = extract_method_code(source_lines, start_line, spans.end_line(method_node))
+            if not needs_model(method_node, code_snippet):
+                continue
             methods_data.append({
                 'start_line': start_line,
                 'code_snippet': code_snippet,
@@ -5,28 +5,28 @@ Detects Feature Envy code smell using a trained model.
 Similar structure to complex_method.py
 """
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import javalang
 import os
+from config import INFERENCE_BACKEND, FEATURE_ENVY_BATCH_SIZE, FEATURE_ENVY_MAX_BATCH_TOKENS
+from result_cache import fingerprint
+from ..registry import handles
+from . import coalescer, inference, models
 from ..thresholds import SMELL_CATEGORY_WEIGHTS
 
 # Get the directory of the current file
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 
-# Load model from local directories
+# Model and tokenizer directories; loaded by the registry on first use
 model_path = os.path.join(project_root, "feature-envy")
 tokenizer_path = os.path.join(project_root, "feature-envy")
+spec = models.register(
+    "feature_envy", model_path, tokenizer_path,
+    max_batch_size=FEATURE_ENVY_BATCH_SIZE, max_batch_tokens=FEATURE_ENVY_MAX_BATCH_TOKENS,
+)
 
-# Load tokenizer and model from local paths
-tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, local_files_only=True)
-model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
-
-# Optimization: Set model to eval mode and use GPU if available
-model.eval()
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
-
+# Predictions are cached per snippet for this exact model, tokenizer and backend
+prediction_cache = inference.PredictionCache("feature_envy", fingerprint(spec.model_id, INFERENCE_BACKEND))
 
 def detect_feature_envy_batch(code_samples):
     """
@@ -38,28 +38,26 @@ def detect_feature_envy_batch(code_samples):
     Returns:
         List of booleans - True if Feature Envy detected for each sample
     """
-    if not code_samples:
-        return []
-    
-    # Batch tokenization
-    inputs = tokenizer(
-        code_samples, 
-        truncation=True, 
-        max_length=512, 
-        padding=True, 
-        return_tensors="pt"
-    )
-    
-    # Move inputs to device
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-    
-    predictions = torch.argmax(outputs.logits, dim=1).tolist()
+    # Runs on the model's inference thread, batched with concurrent requests
+    predictions = coalescer.predict("feature_envy", _predict_labels, code_samples)
     return [pred == 1 for pred in predictions]
 
 
+def _predict_labels(code_samples):
+    # Chunks sorted by length and capped by padded token count, so one class
+    # with hundreds of methods never becomes a single huge tensor
+    loaded = models.get("feature_envy")
+    return inference.predict_labels(
+        "feature_envy", loaded.tokenizer, loaded.model, loaded.device, code_samples,
+        max_batch_size=FEATURE_ENVY_BATCH_SIZE,
+        max_batch_tokens=FEATURE_ENVY_MAX_BATCH_TOKENS,
+        cache=prediction_cache,
+    )
+
+
+inference.register_predictor("feature_envy", detect_feature_envy_batch)
+
+
 def detect_feature_envy(code_sample):
     """
     Detect if a code sample exhibits Feature Envy smell.
@@ -74,18 +72,21 @@ def detect_feature_envy(code_sample):
     return results[0] if results else False
 
 
-def detect_feature_envy_smell(node, source_lines, filepath, filename):
+@handles(javalang.tree.CompilationUnit)
+def detect_feature_envy_smell(node, source_lines, filepath, filename, context=None):
     """
     Detect Feature Envy smell in a Java method.
     
     Args:
-        node: AST node (MethodDeclaration)
+        node: AST node (CompilationUnit)
         source_lines: List of source code lines
         filepath: Full path to the file
         filename: Name of the file
+        context: FileContext of the file, if available
         
     Returns:
-        List of smell dicts if detected, empty list otherwise
+        List of smell dicts if detected, empty list otherwise (inference.Deferred
+        placeholders when the context carries an inference queue)
     """
     import javalang.tree
     from .feature_envy_preprocessor import preprocess_java_file
@@ -96,11 +97,12 @@ def detect_feature_envy_smell(node, source_lines, filepath, filename):
     
     results = []
     
-    # Reconstruct content from source lines
-    content = '\n'.join(source_lines)
-    
-    # Get preprocessed samples
-    samples = preprocess_java_file(content, filepath, filename)
+    # Get preprocessed samples, reusing the file's AST when available
+    if context is not None:
+        samples = preprocess_java_file(context.content, filepath, filename, context)
+    else:
+        content = '\n'.join(source_lines)
+        samples = preprocess_java_file(content, filepath, filename)
     
     if not samples:
         return []
@@ -111,22 +113,41 @@ def detect_feature_envy_smell(node, source_lines, filepath, filename):
     if not code_samples:
         return []
     
+    valid_samples = [s for s in samples if s.get('code_sample')]
+
+    # With an inference queue on the context the samples are classified
+    # later, in batches shared with the rest of the project
+    queue = getattr(context, "inference", None)
+    if queue is not None:
+        return [
+            queue.submit(
+                "feature_envy", sample['code_sample'],
+                lambda is_feature_envy, sample=sample: (
+                    _feature_envy_smell(filename, filepath, sample) if is_feature_envy else None),
+                detector=detect_feature_envy_smell.__name__,
+            )
+            for sample in valid_samples
+        ]
+
     # Batch inference - much faster than one-by-one
     predictions = detect_feature_envy_batch(code_samples)
     
     # Match predictions back to samples
-    valid_samples = [s for s in samples if s.get('code_sample')]
     for sample, is_feature_envy in zip(valid_samples, predictions):
         if is_feature_envy:
-            results.append({
-                "codeSmellType": "Feature Envy",
-                "filename": filename,
-                "filepath": filepath,
-                "startline": sample['start_line'],
-                "endline": sample['end_line'],
-                "code": "FE",
-                "category": "Semantic Based",
-                "weight": SMELL_CATEGORY_WEIGHTS.get("Feature Envy", 3)
-            })
+            results.append(_feature_envy_smell(filename, filepath, sample))
     
-    return results
\ No newline at end of file
+    return results
+
+
+def _feature_envy_smell(filename, filepath, sample):
+    return {
+        "codeSmellType": "Feature Envy",
+        "filename": filename,
+        "filepath": filepath,
+        "startline": sample['start_line'],
+        "endline": sample['end_line'],
+        "code": "FE",
+        "category": "Semantic Based",
+        "weight": SMELL_CATEGORY_WEIGHTS.get("Feature Envy", 3)
+    }
@@ -10,6 +10,8 @@ import javalang
 from collections import defaultdict
 from typing import Dict, List, Set, Optional
 
+from ..context import FileContext
+
 
 class ClassData:
     def __init__(self, name, fqn):
@@ -34,10 +36,14 @@ class FeatureEnvyPreprocessor:
     def __init__(self):
         self.classes = {}  # fqn -> ClassData
     
-    def preprocess_file(self, content: str, filepath: str, filename: str) -> List[Dict]:
+    def preprocess_file(self, content: str, filepath: str, filename: str, context=None) -> List[Dict]:
         """
         Preprocess a Java file and extract samples for Feature Envy detection.
         
+        Args:
+            context: FileContext of the file (AST, lines, spans) from
+                     analyze_code; the file is parsed here when not given
+        
         Returns:
             List of dicts with: method_name, start_line, end_line, code_sample
         """
@@ -45,8 +51,9 @@ class FeatureEnvyPreprocessor:
         self.classes = {}
         
         try:
-            processed_content = self._preprocess_content(content)
-            tree = javalang.parse.parse(processed_content)
+            if context is None:
+                context = self._parse(content, filepath)
+            tree = context.tree
             package = tree.package.name if tree.package else ""
             
             # Extract all classes
@@ -70,7 +77,7 @@ class FeatureEnvyPreprocessor:
                 if hasattr(type_decl, 'body') and type_decl.body:
                     for member in type_decl.body:
                         if isinstance(member, javalang.tree.MethodDeclaration):
-                            method = self._extract_method(member, processed_content, fqn)
+                            method = self._extract_method(member, context, fqn)
                             if method:
                                 class_data.methods[method.name] = method
                 
@@ -87,6 +94,19 @@ class FeatureEnvyPreprocessor:
         
         return samples
     
+    def _parse(self, content, filepath):
+        """
+        Parse content, falling back to the regex rewrites only when the
+        original source does not parse.
+        
+        Returns:
+            FileContext of the content the tree was parsed from
+        """
+        try:
+            return FileContext(content, filepath)
+        except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+            return FileContext(self._preprocess_content(content), filepath)
+    
     def _get_name(self, name):
         """Extract string name from various types"""
         if isinstance(name, list):
@@ -106,18 +126,17 @@ class FeatureEnvyPreprocessor:
         content = re.sub(r'@Deprecated\s*', '', content)
         return content
     
-    def _extract_method(self, method_decl, content, class_fqn):
+    def _extract_method(self, method_decl, context, class_fqn):
         """Extract method with its source code and line numbers"""
         try:
             method_name = self._get_name(method_decl.name)
             if not method_name:
                 return None
             
-            lines = content.splitlines()
             start_line = method_decl.position.line if method_decl.position else 1
             
             # Get method source and end line
-            method_source, end_line = self._get_method_source(lines, start_line - 1, method_name)
+            method_source, end_line = self._get_method_source(context, method_decl, start_line)
             
             if not method_source:
                 return None
@@ -125,65 +144,17 @@ class FeatureEnvyPreprocessor:
             method = MethodData(method_name, method_source, start_line, end_line)
             
             # Find external method calls
-            if hasattr(method_decl, 'filter'):
-                for _, node in method_decl.filter(javalang.tree.MethodInvocation):
-                    if hasattr(node, 'qualifier') and node.qualifier:
-                        qualifier_str = str(node.qualifier)
-                        member = str(node.member) if node.member else "unknown"
-                        
-                        # Skip system calls and built-in Java classes
-                        skip_prefixes = ['this', 'super', 'System', 'String', 
-                                        'Integer', 'Collections', 'Arrays', 'Math']
-                        if not any(qualifier_str.startswith(p) for p in skip_prefixes):
-                            base_qualifier = qualifier_str.split('.')[0]
-                            if base_qualifier:
-                                method.external_calls[base_qualifier].add(member)
+            method.external_calls = find_external_calls(method_decl)
             
             return method
             
         except Exception:
             return None
     
-    def _get_method_source(self, lines, start_idx, method_name):
-        """Get method source code and calculate end line"""
-        try:
-            # Find method start
-            method_start = start_idx
-            for i in range(max(0, start_idx - 2), min(start_idx + 5, len(lines))):
-                if i < len(lines) and method_name in lines[i] and '(' in lines[i]:
-                    method_start = i
-                    break
-            
-            # Find method end by counting braces
-            brace_count = 0
-            end_line = method_start + 1
-            found_opening_brace = False
-            
-            for i in range(method_start, min(method_start + 100, len(lines))):
-                if i >= len(lines):
-                    break
-                
-                line = lines[i]
-                for char in line:
-                    if char == '{':
-                        brace_count += 1
-                        found_opening_brace = True
-                    elif char == '}':
-                        brace_count -= 1
-                        if found_opening_brace and brace_count == 0:
-                            end_line = i + 1  # 1-based
-                            return '\n'.join(lines[method_start:i + 1]), end_line
-                
-                # Abstract method
-                if not found_opening_brace and ';' in line:
-                    return '\n'.join(lines[method_start:i + 1]), i + 1
-            
-            # Fallback
-            end_line = min(method_start + 20, len(lines))
-            return '\n'.join(lines[method_start:end_line]), end_line
-            
-        except Exception:
-            return "", start_idx + 1
+    def _get_method_source(self, context, method_decl, start_line):
+        """Get method source code and its end line from the file's span index"""
+        end_line = context.spans.end_line(method_decl) or start_line
+        return '\n'.join(context.source_lines[start_line - 1:end_line]), end_line
     
     def _is_getter_setter(self, method):
         """Check if method is a simple getter or setter"""
@@ -250,7 +221,7 @@ class FeatureEnvyPreprocessor:
                 lines.append("")
                 lines.append(f"class {ref_class.name} {{")
                 
-                for called_method in list(called_methods):
+                for called_method in sorted(called_methods):
                     if called_method in ref_class.methods:
                         ref_method_source = self._remove_comments(ref_class.methods[called_method].source)
                         for line in ref_method_source.splitlines():
@@ -265,7 +236,7 @@ class FeatureEnvyPreprocessor:
                 # Create stub class for external classes not found in the file
                 lines.append("")
                 lines.append(f"class {qualifier} {{")
-                for called_method in list(called_methods):
+                for called_method in sorted(called_methods):
                     lines.append(f"    public void {called_method}() {{}}")
                 lines.append("}")
         
@@ -313,12 +284,33 @@ class FeatureEnvyPreprocessor:
         return '\n'.join(cleaned_lines)
 
 
-def preprocess_java_file(content: str, filepath: str, filename: str) -> List[Dict]:
+def find_external_calls(method_decl):
+    """Methods called on other objects: base qualifier -> set of member names"""
+    external_calls = defaultdict(set)
+    if hasattr(method_decl, 'filter'):
+        for _, node in method_decl.filter(javalang.tree.MethodInvocation):
+            if hasattr(node, 'qualifier') and node.qualifier:
+                qualifier_str = str(node.qualifier)
+                member = str(node.member) if node.member else "unknown"
+                
+                # Skip system calls and built-in Java classes
+                skip_prefixes = ['this', 'super', 'System', 'String', 
+                                'Integer', 'Collections', 'Arrays', 'Math']
+                if not any(qualifier_str.startswith(p) for p in skip_prefixes):
+                    base_qualifier = qualifier_str.split('.')[0]
+                    if base_qualifier:
+                        external_calls[base_qualifier].add(member)
+    return external_calls
+
+
+def preprocess_java_file(content: str, filepath: str, filename: str, context=None) -> List[Dict]:
     """
     Convenience function to preprocess a Java file.
     
+    Pass the file's FileContext to avoid parsing it again.
+    
     Returns:
         List of samples with: method_name, class_name, start_line, end_line, code_sample
     """
     preprocessor = FeatureEnvyPreprocessor()
-    return preprocessor.preprocess_file(content, filepath, filename)
+    return preprocessor.preprocess_file(content, filepath, filename, context)
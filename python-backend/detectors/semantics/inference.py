@@ -0,0 +1,247 @@
+"""
+Batched Model Inference
+
+Semantic detectors don't have to run their model the moment they visit a
+node. With an InferenceQueue on the file context they submit the snippet
+and return a Deferred placeholder; the caller flushes the queue once it
+holds snippets from many files (a whole project, or INFERENCE_FLUSH_SAMPLES)
+and every prediction is mapped back to the smell it stands for.
+
+Batches are planned by token length: snippets are sorted, grouped into
+length buckets and packed until a batch would exceed the sample or token
+budget, so short methods are never padded to the length of long ones.
+
+Predictions are cached per snippet (PredictionCache), so getters,
+equals/hashCode boilerplate and unchanged methods of a new upload skip
+the model entirely; only cache misses are batched.
+"""
+
+from config import PREDICTION_CACHE_DIR, PREDICTION_CACHE_ENTRIES
+from result_cache import MISS, ResultCache, content_hash
+
+from metrics import (
+    DETECTOR_SMELLS,
+    PREDICTION_CACHE_LOOKUPS,
+    MODEL_BATCH_SIZE,
+    MODEL_BATCH_TOKENS,
+    MODEL_SECONDS,
+    MODEL_SEQUENCE_LENGTH,
+    PEAK_RSS_BYTES,
+    peak_rss_bytes,
+)
+
+# Padded sequence lengths batches are grouped by (the model maximum is 512)
+LENGTH_BUCKETS = (32, 64, 128, 256, 512)
+
+# name -> predict(texts) returning one prediction per text, in order
+_predictors = {}
+
+
+def register_predictor(name, predict):
+    _predictors[name] = predict
+
+
+def bucket_for(length, buckets=LENGTH_BUCKETS):
+    for bucket in buckets:
+        if length <= bucket:
+            return bucket
+    return buckets[-1]
+
+
+def plan_batches(lengths, max_batch_size, max_batch_tokens, buckets=LENGTH_BUCKETS):
+    """
+    Group sample indices into batches.
+
+    Samples are taken shortest first; a batch is closed when the next
+    sample falls into a longer bucket, when it holds max_batch_size
+    samples, or when padding every sample to the longest one would exceed
+    max_batch_tokens. A single sample always forms a batch.
+    """
+    batches = []
+    batch = []
+    batch_bucket = None
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        length = lengths[index]
+        bucket = bucket_for(length, buckets)
+        if batch and (bucket != batch_bucket
+                      or len(batch) >= max_batch_size
+                      or (len(batch) + 1) * length > max_batch_tokens):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+        batch_bucket = bucket
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def normalize_text(text):
+    """Snippet as sent to the tokenizer: unified line endings, no trailing whitespace"""
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+
+
+class PredictionCache:
+    """Label and logits per snippet for one model version (memory LRU + optional disk)"""
+
+    def __init__(self, name, model_id, max_entries=PREDICTION_CACHE_ENTRIES, directory=PREDICTION_CACHE_DIR):
+        self.name = name
+        self._cache = ResultCache(f"{name}-{model_id}", max_entries, directory)
+
+    def enabled(self):
+        return self._cache.max_entries > 0 or self._cache.directory is not None
+
+    def get(self, text):
+        """{"label": int, "logits": [float]} for a normalized snippet, or MISS"""
+        value = self._cache.get(content_hash(text.encode("utf-8")))
+        PREDICTION_CACHE_LOOKUPS.inc(model=self.name, result="miss" if value is MISS else "hit")
+        return value
+
+    def put(self, text, label, logits):
+        self._cache.put(content_hash(text.encode("utf-8")), {"label": label, "logits": logits})
+
+
+def predict_labels(name, tokenizer, model, device, texts, max_batch_size, max_batch_tokens,
+                   max_length=512, cache=None):
+    """
+    Predicted class of each text, in input order.
+
+    Texts are normalized and looked up in the prediction cache; the
+    remaining distinct texts are tokenized once without padding and each
+    planned batch is padded only to its own longest sample.
+    """
+    if not texts:
+        return []
+
+    texts = [normalize_text(text) for text in texts]
+    if cache is None or not cache.enabled():
+        return classify(name, tokenizer, model, device, texts, max_batch_size, max_batch_tokens, max_length)[0]
+
+    labels = [None] * len(texts)
+    misses = {}  # text -> indices waiting for it
+    for index, text in enumerate(texts):
+        if text in misses:
+            misses[text].append(index)
+            continue
+        cached = cache.get(text)
+        if cached is MISS:
+            misses[text] = [index]
+        else:
+            labels[index] = cached["label"]
+
+    if misses:
+        miss_texts = list(misses)
+        miss_labels, miss_logits = classify(
+            name, tokenizer, model, device, miss_texts, max_batch_size, max_batch_tokens, max_length)
+        for text, label, logits in zip(miss_texts, miss_labels, miss_logits):
+            cache.put(text, label, logits)
+            for index in misses[text]:
+                labels[index] = label
+    return labels
+
+
+def classify(name, tokenizer, model, device, texts, max_batch_size, max_batch_tokens, max_length=512):
+    """(labels, logits) of each text, in input order, without the cache"""
+    # Imported here so the queue below stays usable without loading torch
+    import torch
+
+    encodings = tokenizer(list(texts), truncation=True, max_length=max_length)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+
+    labels = [None] * len(texts)
+    logits = [None] * len(texts)
+    for batch in plan_batches(lengths, max_batch_size, max_batch_tokens):
+        features = {key: [values[i] for i in batch] for key, values in encodings.items()}
+        inputs = tokenizer.pad(features, return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with MODEL_SECONDS.time(model=name), torch.no_grad():
+            outputs = model(**inputs)
+        MODEL_BATCH_SIZE.observe(len(batch), model=name)
+        MODEL_SEQUENCE_LENGTH.observe(inputs["input_ids"].shape[1], model=name)
+        MODEL_BATCH_TOKENS.observe(len(batch) * inputs["input_ids"].shape[1], model=name)
+        peak = peak_rss_bytes()
+        if peak is not None:
+            PEAK_RSS_BYTES.set_max(peak)
+
+        batch_labels = torch.argmax(outputs.logits, dim=1).tolist()
+        batch_logits = outputs.logits.float().cpu().tolist()
+        for index, label, row in zip(batch, batch_labels, batch_logits):
+            labels[index] = label
+            logits[index] = row
+    return labels, logits
+
+
+def warm_up_batches(tokenizer, model, device, max_batch_size, max_batch_tokens, buckets=LENGTH_BUCKETS):
+    """
+    Run dummy batches of every shape classify() plans: a single sample and
+    the largest batch the budgets allow at each length bucket. The first
+    pass at a shape pays for kernel selection and allocator growth, so the
+    first real request doesn't. Returns the (samples, length) shapes run.
+    """
+    import torch
+
+    token_id = tokenizer.unk_token_id if tokenizer.unk_token_id is not None else 0
+    shapes = []
+    for length in buckets:
+        for size in sorted({1, max(1, min(max_batch_size, max_batch_tokens // length))}):
+            input_ids = torch.full((size, length), token_id, dtype=torch.long).to(device)
+            with torch.no_grad():
+                model(input_ids=input_ids, attention_mask=torch.ones_like(input_ids))
+            shapes.append((size, length))
+    return shapes
+
+
+class Deferred:
+    """Placeholder for a smell that depends on a pending model prediction"""
+
+    __slots__ = ("detector", "build", "value")
+
+    def __init__(self, detector, build):
+        self.detector = detector
+        self.build = build
+        self.value = None
+
+
+class InferenceQueue:
+    """Snippets waiting for a model, grouped by predictor name"""
+
+    def __init__(self):
+        self._requests = {}
+
+    def submit(self, name, text, build, detector):
+        """
+        Queue text for the named predictor. build(prediction) returns the
+        smell (or None) once the prediction is known.
+        """
+        deferred = Deferred(detector, build)
+        self._requests.setdefault(name, []).append((text, deferred))
+        return deferred
+
+    def __len__(self):
+        return sum(len(requests) for requests in self._requests.values())
+
+    def flush(self):
+        """Run every queued snippet through its model and resolve the placeholders"""
+        requests, self._requests = self._requests, {}
+        for name, items in requests.items():
+            predictions = _predictors[name]([text for text, _ in items])
+            for (_, deferred), prediction in zip(items, predictions):
+                deferred.value = deferred.build(prediction)
+
+
+def has_pending(smells):
+    return bool(smells) and any(isinstance(smell, Deferred) for smell in smells)
+
+
+def resolve(smells):
+    """Replace resolved placeholders with their smells, dropping the empty ones"""
+    if not has_pending(smells):
+        return smells
+    resolved = []
+    for smell in smells:
+        if not isinstance(smell, Deferred):
+            resolved.append(smell)
+        elif smell.value:
+            resolved.append(smell.value)
+            DETECTOR_SMELLS.inc(detector=smell.detector)
+    return resolved
@@ -0,0 +1,180 @@
+"""
+Model Registry
+
+Tokenizers and classifiers are loaded once per process, on first use or by
+an explicit warm_up(), instead of when a detector module is imported.
+Detectors register the model directory and tokenizer directory they need;
+tokenizers are shared by directory, so the Complex Method model reuses the
+Feature Envy tokenizer rather than loading the same vocabulary twice.
+
+torch and transformers are imported only when something is loaded, so a
+process that never runs a model (rules only, or a web process answering
+health checks) never imports them. Load times are logged and exported as
+codesmell_model_load_seconds.
+
+warm_up() also runs dummy batches at every batch and sequence bucket on
+each model's inference thread, so the first real request doesn't pay for
+kernel initialization; status() reports what is loaded and warm.
+
+MODEL_TIER selects between the full models and the small students
+distilled from them (tools/distill_student.py). A student lives next to
+its teacher as "<model directory>-student" and uses the same tokenizer.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from config import INFERENCE_BACKEND, MODEL_TIER, ONNX_EXPORT_DIR
+from metrics import MODEL_LOAD_SECONDS
+from result_cache import directory_version, fingerprint
+from . import coalescer, inference
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("full", "student")
+
+
+def student_path(model_path):
+    """Directory of the student distilled from the model at model_path"""
+    return os.path.normpath(model_path) + "-student"
+
+
+class ModelSpec:
+    """Where a classifier and its tokenizer live, and the version of both"""
+
+    def __init__(self, name, model_path, tokenizer_path, tier="full", max_batch_size=32, max_batch_tokens=8192):
+        self.name = name
+        self.tier = tier
+        # Batch budgets of the detector, which decide the warm-up shapes
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.model_path = student_path(model_path) if tier == "student" else model_path
+        self.tokenizer_path = tokenizer_path
+        # Version of the model files; with the backend it identifies cached
+        # predictions and ONNX exports
+        self.model_id = fingerprint(directory_version(self.model_path), directory_version(tokenizer_path))
+
+
+class LoadedModel:
+    """A loaded classifier with its (possibly shared) tokenizer"""
+
+    __slots__ = ("spec", "tokenizer", "model", "device")
+
+    def __init__(self, spec, tokenizer, model, device):
+        self.spec = spec
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+
+
+_specs = {}
+_tokenizers = {}  # real tokenizer directory -> tokenizer
+_models = {}  # name -> LoadedModel
+_load_seconds = {}  # "model:<name>" / "tokenizer:<directory name>" -> seconds
+_warm_up_seconds = {}  # name -> seconds
+_lock = threading.RLock()
+
+
+def register(name, model_path, tokenizer_path, tier=MODEL_TIER, max_batch_size=32, max_batch_tokens=8192):
+    """
+    Declare a model; nothing is loaded until get(name) or warm_up().
+    model_path is the full model, the tier decides which one is used.
+    """
+    if tier not in TIERS:
+        raise ValueError(f"Unknown model tier {tier!r}, expected one of {TIERS}")
+    if tier == "student" and not os.path.isdir(student_path(model_path)):
+        logger.warning("No student model at %s, using the full %s model", student_path(model_path), name)
+        tier = "full"
+    spec = ModelSpec(name, model_path, tokenizer_path, tier, max_batch_size, max_batch_tokens)
+    _specs[name] = spec
+    return spec
+
+
+def registered():
+    return list(_specs)
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def get_tokenizer(path):
+    """Tokenizer at path, loaded once and shared by every model using it"""
+    key = os.path.realpath(path)
+    with _lock:
+        tokenizer = _tokenizers.get(key)
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+
+            start = time.perf_counter()
+            tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+            _record("tokenizer", os.path.basename(key), time.perf_counter() - start)
+            _tokenizers[key] = tokenizer
+        return tokenizer
+
+
+def get(name):
+    """LoadedModel for a registered name, loading it on first use"""
+    loaded = _models.get(name)
+    if loaded is not None:
+        return loaded
+    with _lock:
+        loaded = _models.get(name)
+        if loaded is None:
+            spec = _specs[name]
+            try:
+                tokenizer = get_tokenizer(spec.tokenizer_path)
+                # backends imports torch, so it is only imported once a model is needed
+                from . import backends
+
+                start = time.perf_counter()
+                model, device = backends.load_classifier(
+                    spec.model_path, INFERENCE_BACKEND, ONNX_EXPORT_DIR, spec.model_id)
+                _record("model", f"{name}-{spec.tier}", time.perf_counter() - start)
+            except Exception:
+                logger.exception("Error loading the %s model from %s", name, spec.model_path)
+                raise
+            loaded = _models[name] = LoadedModel(spec, tokenizer, model, device)
+        return loaded
+
+
+def warm_up(names=None):
+    """
+    Load the given (default: every registered) models now and run their
+    warm-up batches once; returns status().
+    """
+    for name in names or registered():
+        loaded = get(name)
+        if name in _warm_up_seconds:
+            continue
+        spec = loaded.spec
+        start = time.perf_counter()
+        shapes = coalescer.call(name, lambda: inference.warm_up_batches(
+            loaded.tokenizer, loaded.model, loaded.device, spec.max_batch_size, spec.max_batch_tokens))
+        seconds = _warm_up_seconds[name] = time.perf_counter() - start
+        logger.info("Warmed up %s with %d batch shapes in %.2fs", name, len(shapes), seconds)
+    return status()
+
+
+def status():
+    """{name: {"tier", "loaded", "warm", "loadSeconds", "warmUpSeconds"}} per registered model"""
+    with _lock:
+        return {
+            name: {
+                "tier": spec.tier,
+                "loaded": name in _models,
+                "warm": name in _warm_up_seconds,
+                "loadSeconds": _load_seconds.get(f"model:{name}-{spec.tier}"),
+                "warmUpSeconds": _warm_up_seconds.get(name),
+            }
+            for name, spec in _specs.items()
+        }
+
+
+def _record(kind, name, seconds):
+    _load_seconds[f"{kind}:{name}"] = seconds
+    MODEL_LOAD_SECONDS.set(seconds, kind=kind, name=name)
+    logger.info("Loaded %s %s (%s backend) in %.2fs",
+                kind, name, INFERENCE_BACKEND if kind == "model" else "-", seconds)
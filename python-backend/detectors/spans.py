@@ -0,0 +1,142 @@
+"""
+Node Span Index
+
+Finds where types, methods, constructors and statements end using a
+single pass over the file's tokens. Braces inside strings and comments are
+not tokens, so they never throw the count off, and each lookup is a binary
+search instead of a scan to the end of the file.
+"""
+
+from bisect import bisect_left
+
+import javalang
+from javalang.tokenizer import Separator
+
+
+class SpanIndex:
+    def __init__(self, tokens):
+        # Position of every '{' in source order, and the position of its matching '}'
+        self._open_positions = []
+        self._close_positions = []
+        # Position of every ';' in source order
+        self._semicolons = []
+
+        stack = []
+        last_position = (1, 1)
+        for token in tokens:
+            last_position = tuple(token.position)
+            if not isinstance(token, Separator):
+                continue
+            if token.value == '{':
+                stack.append(len(self._open_positions))
+                self._open_positions.append(tuple(token.position))
+                self._close_positions.append(None)
+            elif token.value == '}':
+                if stack:
+                    self._close_positions[stack.pop()] = tuple(token.position)
+            elif token.value == ';':
+                self._semicolons.append(tuple(token.position))
+
+        # Unbalanced braces run to the end of the file
+        for index in stack:
+            self._close_positions[index] = last_position
+
+    @classmethod
+    def from_source(cls, content):
+        return cls(javalang.tokenizer.tokenize(content))
+
+    def block_end(self, line, column=0):
+        """
+        Line of the '}' closing the first '{' at or after (line, column),
+        or None if there is no such brace.
+        """
+        close = self._block_close((line, column))
+        return close[0] if close else None
+
+    def statement_end(self, line, column=0):
+        """Line of the first ';' at or after (line, column), or None"""
+        semicolon = self._semicolon((line, column))
+        return semicolon[0] if semicolon else None
+
+    def _block_close(self, position):
+        index = bisect_left(self._open_positions, position)
+        if index == len(self._open_positions):
+            return None
+        return self._close_positions[index]
+
+    def _semicolon(self, position):
+        index = bisect_left(self._semicolons, position)
+        if index == len(self._semicolons):
+            return None
+        return self._semicolons[index]
+
+    def _statement_close(self, statement):
+        """Position of the last '}' or ';' of a statement, or None"""
+        # The statement ends with its last branch or body
+        while True:
+            if isinstance(statement, javalang.tree.IfStatement):
+                statement = statement.else_statement or statement.then_statement
+            elif isinstance(statement, (javalang.tree.ForStatement, javalang.tree.WhileStatement)):
+                statement = statement.body
+            else:
+                break
+        if statement is None or statement.position is None:
+            return None
+        position = tuple(statement.position)
+
+        if isinstance(statement, javalang.tree.DoStatement):
+            # do { ... } while (...);
+            body = self._statement_close(statement.body)
+            return self._semicolon(body) if body else None
+        if isinstance(statement, javalang.tree.TryStatement):
+            # The try block, each catch block and the finally block in turn
+            blocks = 1 + len(statement.catches or []) + (statement.finally_block is not None)
+            for _ in range(blocks):
+                position = self._block_close(position)
+                if position is None:
+                    return None
+            return position
+        if isinstance(statement, (javalang.tree.BlockStatement, javalang.tree.SwitchStatement,
+                                  javalang.tree.SynchronizedStatement)):
+            return self._block_close(position)
+        return self._semicolon(position)
+
+    def end_line(self, node):
+        """
+        End line of a type, method, constructor or statement node: the line
+        of the brace closing its body. Bodiless methods end at their ';', an
+        if statement with its last else branch and other statements at their
+        last '}' or ';'. Falls back to the start line if the end can't be found.
+        """
+        position = node.position
+        if position is None:
+            return None
+        start = (position.line, position.column)
+
+        if isinstance(node, javalang.tree.Statement):
+            close = self._statement_close(node)
+            return close[0] if close else position.line
+
+        if isinstance(node, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+            # Skip braces in parameter annotations, e.g. f(@Ann({1}) int a)
+            for parameter in node.parameters:
+                if parameter.position:
+                    start = max(start, (parameter.position.line, parameter.position.column))
+            if isinstance(node, javalang.tree.MethodDeclaration) and node.body is None:
+                return self.statement_end(*start) or position.line
+
+        end = self.block_end(*start)
+        return end if end is not None else position.line
+
+    def span(self, node):
+        """(start_line, end_line) of a node, or None if it has no position"""
+        if node.position is None:
+            return None
+        return node.position.line, self.end_line(node)
+
+
+def get_span_index(context, source_lines):
+    """Span index of the file being analyzed; built from source_lines without a context"""
+    if context is not None:
+        return context.spans
+    return SpanIndex.from_source('\n'.join(source_lines))
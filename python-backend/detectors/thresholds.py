@@ -24,6 +24,11 @@ TOO_MANY_FIELDS_THRESHOLD = 15
 # Complexity increases with: if, for, while, do, switch, ternary, &&, || operators
 CYCLOMATIC_COMPLEXITY_THRESHOLD = 10
 
+# Class Complexity Detector (optional, ENABLE_CLASS_COMPLEXITY)
+# Threshold: Weighted methods per class (WMC), the cyclomatic complexity summed
+# over the methods and constructors of a class
+CLASS_COMPLEXITY_THRESHOLD = 80
+
 # Excessive Parameter List Detector
 # Threshold: Number of parameters in method/constructor declarations
 EXCESSIVE_PARAMETER_LIST_THRESHOLD = 10
@@ -131,6 +136,7 @@ SEVERITY_WEIGHTS = {
 SMELL_CATEGORY_WEIGHTS = {
     # Design Patterns
     "High Cyclomatic Complexity (Method)": 3,
+    "High Class Complexity": 3,
     "Too Many Methods": 3,
     "Too Many Fields": 3,
     "Utility Class": 1,
@@ -152,6 +158,7 @@ SMELL_CATEGORY_WEIGHTS = {
     "Result Set Check": 2,
     "Expensive Log Statement": 1,
     "Literals First in Comparison": 1,
+    "Unused Local Variable": 1,
     
     # Semantic-Based (ML)
     "Complex Method": 3,
@@ -180,6 +187,11 @@ DETECTOR_CONFIG = {
         "description": "Method with high cyclomatic complexity",
         "weight": 3,
     },
+    "class_complexity": {
+        "threshold": CLASS_COMPLEXITY_THRESHOLD,
+        "description": "Class with high total cyclomatic complexity (WMC)",
+        "weight": 3,
+    },
     "excessive_parameter_list": {
         "threshold": EXCESSIVE_PARAMETER_LIST_THRESHOLD,
         "description": "Method with excessive parameters",
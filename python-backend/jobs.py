@@ -0,0 +1,230 @@
+"""
+Analysis Jobs
+
+Background analysis for large projects. POST /jobs stores the uploaded
+archive and returns a job id immediately; a bounded pool of threads runs
+the analysis while clients poll for status and per-file progress.
+
+Job state lives in a local SQLite database next to the stored archives,
+so jobs that were queued (or interrupted while running) when the process
+stopped are picked up again on the next start.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Write progress to the database at most this often (seconds)
+PROGRESS_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    archive_path TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    files_total INTEGER,
+    files_done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT
+)
+"""
+
+
+class JobFailed(Exception):
+    """Analysis error whose message is safe to return to the client"""
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are already queued or running"""
+
+
+class JobStore:
+    """SQLite-backed job records"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def create(self, job_id, filename, archive_path):
+        self._execute(
+            "INSERT INTO jobs (id, status, filename, archive_path, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, QUEUED, filename, archive_path, time.time()))
+
+    def get(self, job_id):
+        """Job record without its result"""
+        rows = self._query(
+            "SELECT id, status, filename, archive_path, created_at, started_at, finished_at,"
+            " files_total, files_done, error FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def result(self, job_id):
+        rows = self._query("SELECT result FROM jobs WHERE id = ?", (job_id,))
+        if not rows or rows[0]["result"] is None:
+            return None
+        return json.loads(rows[0]["result"])
+
+    def pending(self):
+        """Queued and running jobs, oldest first"""
+        return self._query(
+            "SELECT id, status, archive_path FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (QUEUED, RUNNING))
+
+    def pending_count(self):
+        return self._query(
+            "SELECT COUNT(*) AS n FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING))[0]["n"]
+
+    def mark_queued(self, job_id):
+        self._execute(
+            "UPDATE jobs SET status = ?, started_at = NULL, files_total = NULL, files_done = 0 WHERE id = ?",
+            (QUEUED, job_id))
+
+    def mark_running(self, job_id):
+        self._execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                      (RUNNING, time.time(), job_id))
+
+    def set_progress(self, job_id, files_done, files_total):
+        self._execute("UPDATE jobs SET files_done = ?, files_total = ? WHERE id = ?",
+                      (files_done, files_total, job_id))
+
+    def mark_done(self, job_id, result):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, archive_path = NULL WHERE id = ?",
+            (DONE, time.time(), json.dumps(result), job_id))
+
+    def mark_failed(self, job_id, error):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = ?, archive_path = NULL WHERE id = ?",
+            (FAILED, time.time(), error, job_id))
+
+    def prune(self, older_than):
+        """Delete finished jobs that finished before the given timestamp"""
+        return self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, older_than))
+
+
+class JobRunner:
+    """
+    Runs analysis jobs on a bounded thread pool.
+
+    analyze(archive_path, progress) returns the JSON-serializable result;
+    progress(files_done, files_total) is the traverse_zip callback.
+    """
+
+    def __init__(self, store, archive_dir, analyze, workers=1, max_pending=16, retention_seconds=86400):
+        self.store = store
+        self.archive_dir = archive_dir
+        self.analyze = analyze
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="analysis-job")
+        self._submit_lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def start(self):
+        """Requeue jobs left queued or running by a previous process"""
+        self._prune()
+        for job in self.store.pending():
+            if not job["archive_path"] or not os.path.exists(job["archive_path"]):
+                self.store.mark_failed(job["id"], "Archive lost before analysis")
+                continue
+            if job["status"] == RUNNING:
+                logger.info("Requeueing interrupted job %s", job["id"])
+                self.store.mark_queued(job["id"])
+            self._executor.submit(self._run, job["id"], job["archive_path"])
+
+    def submit(self, filename, stream):
+        """Store the uploaded archive and queue it; returns the job id"""
+        with self._submit_lock:
+            if self.store.pending_count() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs already pending")
+
+            job_id = uuid.uuid4().hex
+            archive_path = os.path.join(self.archive_dir, job_id + ".zip")
+            fd, tmp_path = tempfile.mkstemp(dir=self.archive_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    shutil.copyfileobj(stream, handle, 1024 * 1024)
+                os.replace(tmp_path, archive_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self.store.create(job_id, filename, archive_path)
+        self._prune()
+        self._executor.submit(self._run, job_id, archive_path)
+        return job_id
+
+    def _prune(self):
+        if self.retention_seconds > 0:
+            self.store.prune(time.time() - self.retention_seconds)
+
+    def _run(self, job_id, archive_path):
+        self.store.mark_running(job_id)
+        last_write = [0.0]
+
+        def progress(files_done, files_total):
+            now = time.monotonic()
+            if files_done in (0, files_total) or now - last_write[0] >= PROGRESS_INTERVAL:
+                last_write[0] = now
+                self.store.set_progress(job_id, files_done, files_total)
+
+        try:
+            result = self.analyze(archive_path, progress)
+        except JobFailed as e:
+            logger.warning("Job %s failed: %s", job_id, e)
+            self.store.mark_failed(job_id, str(e))
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            self.store.mark_failed(job_id, "Internal server error")
+        else:
+            self.store.mark_done(job_id, result)
+        finally:
+            try:
+                os.remove(archive_path)
+            except OSError:
+                pass
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
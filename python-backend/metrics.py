@@ -0,0 +1,333 @@
+"""
+Service Metrics
+
+Minimal Prometheus-style counters, gauges and histograms rendered in the
+text exposition format for the /metrics endpoint. No client library is
+required; updates are a dict lookup under a lock, cheap enough to leave
+on in production.
+
+Worker processes collect into their own registry. Their deltas are
+shipped back with each task result (see collect_delta/merge) so the
+request process exposes totals for the whole pool.
+"""
+
+import math
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Latency buckets in seconds, from sub-millisecond rule checks to long model batches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + body + "}"
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}_total{self._label_text(key)} {_number(value)}" for key, value in items]
+
+    def _delta(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def _merge(self, values):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_max(self, value, **labels):
+        """Keep the highest value seen (e.g. peak memory)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {_number(value)}" for key, value in items]
+
+    def _delta(self):
+        # Gauges are not reset; workers ship their current values and the
+        # request process keeps the highest one seen
+        with self._lock:
+            return dict(self._values)
+
+    def _merge(self, values):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = max(self._values.get(key, value), value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def sum(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._label_text(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+    def _delta(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def _merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                for index, bucket_count in enumerate(counts):
+                    state[0][index] += bucket_count
+                state[1] += total
+                state[2] += count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def collect_delta(self):
+        """Values gathered since the last call, reset afterwards (picklable)"""
+        delta = {}
+        for name, metric in list(self._metrics.items()):
+            values = metric._delta()
+            if values:
+                delta[name] = values
+        return delta
+
+    def merge(self, delta):
+        """Add a delta from collect_delta (e.g. from a worker process)"""
+        for name, values in delta.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._merge(values)
+
+    def clear(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, float):
+        if value == math.inf:
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# =============================================================================
+# ANALYSIS METRICS
+# =============================================================================
+
+REQUESTS = counter(
+    "codesmell_requests", "HTTP requests handled", ("endpoint", "status"))
+REQUEST_SECONDS = histogram(
+    "codesmell_request_seconds", "HTTP request latency", ("endpoint",))
+
+PHASE_SECONDS = histogram(
+    "codesmell_phase_seconds",
+    "Time spent in each analysis phase (unzip, javafx_filter, parse, detectors per file; inference per batch flush)",
+    ("phase",))
+DETECTOR_SECONDS = histogram(
+    "codesmell_detector_seconds", "Time per file spent in each detector", ("detector",))
+DETECTOR_SMELLS = counter(
+    "codesmell_detector_smells", "Smells reported by each detector", ("detector",))
+
+FILES_ANALYZED = counter(
+    "codesmell_files_analyzed", "Java files parsed and run through the detectors")
+FILES_SKIPPED = counter(
+    "codesmell_files_skipped", "Archive entries not analyzed", ("reason",))
+PARSE_FAILURES = counter(
+    "codesmell_parse_failures", "Java files javalang could not parse")
+PIPELINE_STAGE_SECONDS = counter(
+    "codesmell_pipeline_stage_seconds",
+    "Time each analysis pipeline stage (produce, infer, emit) spent working, starved of input or blocked on a full queue",
+    ("stage", "state"))
+PIPELINE_QUEUE_DEPTH = histogram(
+    "codesmell_pipeline_queue_depth", "Chunks already waiting in a pipeline queue when another is added", ("queue",),
+    buckets=(0, 1, 2, 4, 8, 16))
+RESULT_CACHE_LOOKUPS = counter(
+    "codesmell_result_cache_lookups", "Per-file result cache lookups", ("result",))
+PREDICTION_CACHE_LOOKUPS = counter(
+    "codesmell_prediction_cache_lookups", "Per-snippet model prediction cache lookups", ("model", "result"))
+
+CASCADE_DECISIONS = counter(
+    "codesmell_cascade_decisions",
+    "Methods the metric cascade skipped vs sent to the model (skip rate = skipped / total)",
+    ("model", "decision"))
+
+MODEL_SECONDS = histogram(
+    "codesmell_model_seconds", "Model forward pass latency per batch", ("model",))
+MODEL_BATCH_SIZE = histogram(
+    "codesmell_model_batch_size", "Samples per model batch", ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+MODEL_SEQUENCE_LENGTH = histogram(
+    "codesmell_model_sequence_length", "Padded token length of each model batch", ("model",),
+    buckets=(16, 32, 64, 128, 256, 384, 512))
+MODEL_BATCH_TOKENS = histogram(
+    "codesmell_model_batch_tokens", "Padded tokens (samples x length) per model batch", ("model",),
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072))
+COALESCED_REQUESTS = histogram(
+    "codesmell_coalesced_requests", "Requests whose snippets share one coalesced inference batch", ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64))
+COALESCE_WAIT_SECONDS = histogram(
+    "codesmell_coalesce_wait_seconds", "Time snippets wait in the inference queue before their batch starts",
+    ("model",))
+INFERENCE_QUEUE_DEPTH = gauge(
+    "codesmell_inference_queue_depth", "Snippets waiting for each model's inference thread", ("model",))
+MODEL_LOAD_SECONDS = gauge(
+    "codesmell_model_load_seconds", "Time taken to load each model and shared tokenizer", ("kind", "name"))
+PEAK_RSS_BYTES = gauge(
+    "codesmell_peak_rss_bytes", "Peak resident memory of the analysis processes, sampled after each model batch")
@@ -0,0 +1,114 @@
+"""
+Analysis Pipeline Plumbing
+
+Bounded queues between the stages of iter_group (see smell_detector.py):
+
+    produce   unzip, parse, rule detectors, snippet extraction  (thread)
+    infer     model batches for each chunk of snippets          (thread)
+    emit      resolve placeholders, cache and yield results     (caller)
+
+A full queue blocks the stage feeding it, so a slow model (or a slow
+consumer of the results) pauses parsing instead of letting snippets pile
+up. Every stage reports the time it spent working, starved of input and
+blocked on a full queue as codesmell_pipeline_stage_seconds; the stage
+with the highest working share is the bottleneck.
+"""
+
+import queue
+import threading
+import time
+
+from metrics import PIPELINE_QUEUE_DEPTH, PIPELINE_STAGE_SECONDS
+
+# Marks the end of a stage's output
+DONE = object()
+
+# How often a blocked stage checks whether the pipeline was stopped
+_POLL_SECONDS = 0.1
+
+
+class Stopped(Exception):
+    """The pipeline was stopped while a stage was waiting on a queue"""
+
+
+class Failure:
+    """An exception raised in a stage, passed downstream to the caller"""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StageQueue:
+    """Bounded queue between two stages that records waiting time"""
+
+    def __init__(self, name, maxsize, stop):
+        self.name = name
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = stop
+
+    def put(self, item, stage):
+        PIPELINE_QUEUE_DEPTH.observe(self._queue.qsize(), queue=self.name)
+        start = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise Stopped()
+                try:
+                    self._queue.put(item, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            PIPELINE_STAGE_SECONDS.inc(time.perf_counter() - start, stage=stage, state="blocked")
+
+    def get(self, stage):
+        start = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise Stopped()
+                try:
+                    return self._queue.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+        finally:
+            PIPELINE_STAGE_SECONDS.inc(time.perf_counter() - start, stage=stage, state="starved")
+
+
+class busy:
+    """Context manager adding the enclosed time to a stage's working time"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        PIPELINE_STAGE_SECONDS.inc(time.perf_counter() - self.start, stage=self.stage, state="busy")
+        return False
+
+
+def start_stage(name, target, output):
+    """
+    Run target() on a daemon thread. An exception it raises is put on
+    output as a Failure, so the caller sees it where it reads the results.
+    """
+    def run():
+        try:
+            target()
+        except Stopped:
+            pass
+        except BaseException as e:
+            try:
+                output.put(Failure(e), name)
+            except Stopped:
+                pass
+
+    thread = threading.Thread(target=run, name=f"analysis-{name}", daemon=True)
+    thread.start()
+    return thread
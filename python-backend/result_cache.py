@@ -0,0 +1,110 @@
+"""
+Per-file Result Cache
+
+Content-addressed cache of analysis results. Keys are the SHA-256 of a
+file's bytes combined with a fingerprint of everything that can change a
+result (detector set, thresholds, model versions). Entries live in a
+bounded in-memory LRU and, optionally, in a directory on disk shared by
+every worker process.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() when a key is not cached (None is a valid cached result)
+MISS = object()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def directory_version(path):
+    """Version of a model directory (or single file): names, sizes and mtimes of its files"""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return fingerprint(os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+    if not os.path.isdir(path):
+        return "missing"
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            entries.append((os.path.relpath(os.path.join(root, name), path), stat.st_size, stat.st_mtime_ns))
+    return fingerprint(sorted(entries))
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of per-file results"""
+
+    def __init__(self, namespace, max_entries=1024, directory=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.directory = os.path.join(directory, namespace) if directory else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as handle:
+                    value = json.load(handle)
+            except FileNotFoundError:
+                return MISS
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable cache entry %s: %s", key, e)
+                return MISS
+            self._remember(key, value)
+            return value
+
+        return MISS
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            self._write_disk(key, value)
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _write_disk(self, key, value):
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent workers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                json.dump(value, handle)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", key, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,4 +1,15 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
 import javalang
 from detectors.design import (
     utility_class_detector,
@@ -14,9 +25,6 @@ from detectors.design import (
     null_pointer_exception_detector,
     nested_if_detector,
 )
-from detectors.semantics import complex_method
-from detectors.semantics import feature_envy
-
 from detectors.best_practices import (
     reassigning_catch_variables_detector,
     reassigning_loop_variables_detector,
@@ -25,8 +33,107 @@ from detectors.best_practices import (
     expensive_log_statement_detector,
     # implicit_functional_interface_detector,
     literals_first_in_comparison_detector,
-    # unused_local_variable_detector
-) 
+    unused_local_variable_detector,
+)
+from detectors.registry import Ancestry, DispatchTable, walk_nodes
+from detectors.context import FileContext
+from detectors.metrics_table import TABLE_VERSION, get_metrics_table
+from detectors.semantics import inference
+from detectors import thresholds
+from config import (
+    ANALYSIS_WORKERS,
+    ANALYSIS_START_METHOD,
+    ENABLE_SEMANTIC_DETECTORS,
+    ENABLE_CLASS_COMPLEXITY,
+    PRELOAD_MODELS,
+    INFERENCE_BACKEND,
+    INFERENCE_FLUSH_SAMPLES,
+    PIPELINE_MAX_CHUNKS,
+    RESULT_CACHE_ENTRIES,
+    RESULT_CACHE_DIR,
+)
+from result_cache import MISS, ResultCache, content_hash, directory_version, fingerprint
+import metrics
+import pipeline
+from metrics import (
+    DETECTOR_SECONDS,
+    DETECTOR_SMELLS,
+    FILES_ANALYZED,
+    FILES_SKIPPED,
+    PARSE_FAILURES,
+    PHASE_SECONDS,
+    RESULT_CACHE_LOOKUPS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Semantic (model based) detectors, run first on each node. Their models are
+# loaded by detectors.semantics.models on first use (or warm_up_models()),
+# and a rules-only process (ENABLE_SEMANTIC_DETECTORS=0) never imports them.
+if ENABLE_SEMANTIC_DETECTORS:
+    from detectors.semantics import complex_method
+    from detectors.semantics import feature_envy
+
+    SEMANTIC_DETECTORS = [
+        complex_method.detect_complex_method_smell,
+        feature_envy.detect_feature_envy_smell,
+    ]
+    # The models of the selected tier, so switching tiers invalidates results
+    MODEL_PATHS = (complex_method.spec.model_path, complex_method.tokenizer_path,
+                   feature_envy.spec.model_path, feature_envy.tokenizer_path)
+    if complex_method.cascade_path:
+        MODEL_PATHS += (complex_method.cascade_path,)
+else:
+    SEMANTIC_DETECTORS = []
+    MODEL_PATHS = ()
+
+
+def warm_up_models():
+    """
+    Load the semantic detectors' models and run their warm-up batches in
+    this process; returns the state of each model (models.status()).
+    """
+    if not SEMANTIC_DETECTORS:
+        return {}
+    from detectors.semantics import models
+    return models.warm_up()
+
+
+# Rule based detectors
+RULE_DETECTORS = [
+    utility_class_detector.detect_utility_class,
+    too_many_methods_detector.detect_too_many_methods,
+    too_many_fields_detector.detect_too_many_fields,
+    switch_density_detector.detect_switch_density,
+    excessive_parameter_list_detector.detect_excessive_parameter_list,
+    excessive_imports_detector.detect_excessive_imports,
+    cyclomatic_complexity_detector.detect_cyclomatic_complexity,
+    private_constructors_final_detector.detect_private_constructors_final,
+    unchecked_exceptions_detector.detect_unchecked_exceptions,
+    raw_exception_types_detector.detect_raw_exception_types,
+    null_pointer_exception_detector.detect_null_pointer_exception,
+    nested_if_detector.detect_nested_if,
+    reassigning_catch_variables_detector.detect_reassigning_catch_variables,
+    reassigning_loop_variables_detector.detect_reassigning_loop_variables,
+    reassigning_parameters_detector.detect_reassigning_parameters,
+    result_set_check_detector.detect_result_set_check,
+    expensive_log_statement_detector.detect_expensive_log_statement,
+    # implicit_functional_interface_detector.detect_implicit_functional_interface,
+    literals_first_in_comparison_detector.detect_literals_first_in_comparison,
+    unused_local_variable_detector.detect_unused_local_variable,
+]
+
+# Optional rule based detectors
+if ENABLE_CLASS_COMPLEXITY:
+    RULE_DETECTORS.append(cyclomatic_complexity_detector.detect_class_complexity)
+
+DETECTORS = SEMANTIC_DETECTORS + RULE_DETECTORS
+
+# Built once; maps each javalang node type to its detectors
+DISPATCH_TABLE = DispatchTable(DETECTORS)
+
+# Bump when a code change alters detector output, to invalidate cached results
+RESULT_CACHE_VERSION = 4
 
 def is_javafx_code(content):
     """
@@ -150,71 +257,579 @@ def is_javafx_code(content):
     
     return False
 
-def analyze_code(content, filepath):
+def analyze_code(content, filepath, inference_queue=None, with_metrics=False):
+    """
+    Smells of one Java file. With an inference_queue, semantic detectors
+    queue their snippets and the result holds inference.Deferred
+    placeholders until the queue is flushed (see inference.resolve).
+
+    with_metrics returns (smells, metrics table as a dict) instead, the
+    table being None for an unparsable file.
+    """
     smells = []
-    source_lines = content.splitlines()
-    filename = filepath.split('/')[-1]
 
-    # AST-based analysis
+    # AST-based analysis: the file is parsed once into a context shared by
+    # all detectors, then walked once; each node only reaches the detectors
+    # registered for its type
     try:
-        tree = javalang.parse.parse(content)
-        detectors = [
-            complex_method.detect_complex_method_smell,
-            feature_envy.detect_feature_envy_smell,
-            utility_class_detector.detect_utility_class,
-            too_many_methods_detector.detect_too_many_methods,
-            too_many_fields_detector.detect_too_many_fields,
-            switch_density_detector.detect_switch_density,
-            excessive_parameter_list_detector.detect_excessive_parameter_list,
-            excessive_imports_detector.detect_excessive_imports,
-            cyclomatic_complexity_detector.detect_cyclomatic_complexity,
-            private_constructors_final_detector.detect_private_constructors_final,
-            unchecked_exceptions_detector.detect_unchecked_exceptions,
-            raw_exception_types_detector.detect_raw_exception_types,
-            null_pointer_exception_detector.detect_null_pointer_exception,
-            nested_if_detector.detect_nested_if,
-            reassigning_catch_variables_detector.detect_reassigning_catch_variables,
-            reassigning_loop_variables_detector.detect_reassigning_loop_variables,
-            reassigning_parameters_detector.detect_reassigning_parameters,
-            result_set_check_detector.detect_result_set_check,
-            expensive_log_statement_detector.detect_expensive_log_statement,
-            # implicit_functional_interface_detector.detect_implicit_functional_interface,
-            literals_first_in_comparison_detector.detect_literals_first_in_comparison,
-            # unused_local_variable_detector.detect_unused_local_variable
-        ]
-        for path, node in javalang.ast.walk_tree(tree):
-            for detector in detectors:
-                result = detector(node, source_lines, filepath, filename)
-                if result:
-                    smells.extend(result if isinstance(result, list) else [result])
+        with PHASE_SECONDS.time(phase="parse"):
+            context = FileContext(content, filepath)
     except javalang.parser.JavaSyntaxError:
-        pass  # Skip unparsable files
+        PARSE_FAILURES.inc()
+        # Skip unparsable files
+        return (smells, None) if with_metrics else smells
 
+    FILES_ANALYZED.inc()
+    context.inference = inference_queue
+    context.ancestry = Ancestry()
+    source_lines = context.source_lines
+    filename = context.filename
 
+    # Time is summed per detector and reported once per file
+    clock = time.perf_counter
+    detector_seconds = dict.fromkeys(DETECTORS, 0.0)
+    detector_smells = dict.fromkeys(DETECTORS, 0)
+    walk_start = clock()
+    try:
+        for node in walk_nodes(context.tree, context.ancestry):
+            for detector in DISPATCH_TABLE.handlers_for(type(node)):
+                start = clock()
+                result = detector(node, source_lines, filepath, filename, context=context)
+                detector_seconds[detector] += clock() - start
+                if result:
+                    found = result if isinstance(result, list) else [result]
+                    # Deferred smells are counted once they are resolved
+                    if not inference.has_pending(found):
+                        detector_smells[detector] += len(found)
+                    smells.extend(found)
+    except javalang.parser.JavaSyntaxError:
+        pass  # Keep what was found before the failure
+    PHASE_SECONDS.observe(clock() - walk_start, phase="detectors")
 
+    for detector, seconds in detector_seconds.items():
+        DETECTOR_SECONDS.observe(seconds, detector=detector.__name__)
+        if detector_smells[detector]:
+            DETECTOR_SMELLS.inc(detector_smells[detector], detector=detector.__name__)
+
+    if with_metrics:
+        # Already filled by the threshold detectors
+        return smells, get_metrics_table(context, source_lines, context.tree).to_dict()
     return smells
 
-import zipfile
+def is_java_source(file_info):
+    """Whether a zip entry is a .java file outside a 'test' directory"""
+    if 'test/' in file_info.filename.lower():
+        return False
+    return file_info.filename.endswith('.java')
+
+
+def analyze_source(data, filepath, inference_queue=None, with_metrics=False):
+    """
+    Analyze raw file bytes; returns its smells, or None if the file is
+    skipped ((smells, metrics table) or (None, None) with_metrics).
+    """
+    skipped = (None, None) if with_metrics else None
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError:
+        FILES_SKIPPED.inc(reason="decode_error")
+        return skipped  # Skip files that can't be decoded
+
+    # Skip JavaFX files
+    with PHASE_SECONDS.time(phase="javafx_filter"):
+        is_javafx = is_javafx_code(content)
+    if is_javafx:
+        FILES_SKIPPED.inc(reason="javafx")
+        return skipped
+
+    return analyze_code(content, filepath, inference_queue, with_metrics)
+
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+def analysis_fingerprint():
+    """Identifies everything besides file content that can change a result"""
+    detector_names = [f"{d.__module__}.{d.__name__}" for d in DETECTORS]
+    threshold_values = {k: v for k, v in vars(thresholds).items() if k.isupper()}
+    model_versions = {path: directory_version(path) for path in MODEL_PATHS}
+    backend = INFERENCE_BACKEND if SEMANTIC_DETECTORS else None
+    return fingerprint(RESULT_CACHE_VERSION, detector_names, threshold_values, model_versions, backend)
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(analysis_fingerprint(), RESULT_CACHE_ENTRIES, RESULT_CACHE_DIR)
+    return _result_cache
+
+
+_metrics_cache = None
+
+
+def get_metrics_cache():
+    """Metrics tables by content; they depend on the parser only, not on detectors or models"""
+    global _metrics_cache
+    if _metrics_cache is None:
+        _metrics_cache = ResultCache(fingerprint("metrics", TABLE_VERSION), RESULT_CACHE_ENTRIES, RESULT_CACHE_DIR)
+    return _metrics_cache
+
+
+def _lookup(cache, metrics_cache, key):
+    """
+    Cached (smells, metrics table) of a content key; smells is MISS unless
+    the smells and, when metrics_cache is given, the table are both cached.
+    """
+    smells = cache.get(key)
+    if metrics_cache is None or smells is MISS:
+        return smells, None
+    table = metrics_cache.get(key)
+    if table is MISS:
+        return MISS, None
+    return smells, table
+
+
+def _analyze(data, filepath, metrics_cache, key, inference_queue=None):
+    """analyze_source for a cache miss; (smells, metrics table), caching the table"""
+    if metrics_cache is None:
+        return analyze_source(data, filepath, inference_queue), None
+    smells, table = analyze_source(data, filepath, inference_queue, with_metrics=True)
+    metrics_cache.put(key, table)
+    return smells, table
+
+
+def _relocate(smells, filepath):
+    """Copy of a cached result with the file path rewritten"""
+    if smells is None:
+        return None
+    filename = filepath.split('/')[-1]
+    return [dict(smell, filename=filename, filepath=filepath) for smell in smells]
+
+
+# Stands in for the smells of a file whose content was seen earlier in the group
+_DUPLICATE = object()
+
+
+def iter_group(zip_ref, infos, tables=None):
+    """
+    Analyze zip entries, yielding each entry's smells in order.
+
+    Identical contents are analyzed once: files already seen in this group
+    (e.g. vendored copies) and files found in the result cache are not
+    analyzed again.
+
+    With a tables dict, each entry's metrics table (see
+    detectors/metrics_table.py) is stored in it under the entry name
+    before the entry's smells are yielded.
+
+    With semantic detectors the work is pipelined (see pipeline.py): a
+    producer thread parses and rule-checks files and queues their model
+    snippets, handing them on in chunks of INFERENCE_FLUSH_SAMPLES; an
+    inference thread classifies each chunk in shared batches while the
+    producer moves on; the caller's thread resolves each chunk and yields
+    its files in order.
+    """
+    cache = get_result_cache()
+    metrics_cache = get_metrics_cache() if tables is not None else None
+    if not SEMANTIC_DETECTORS:
+        yield from _iter_group_serial(zip_ref, infos, cache, metrics_cache, tables)
+        return
+
+    stop = threading.Event()
+    to_infer = pipeline.StageQueue("infer", PIPELINE_MAX_CHUNKS, stop)
+    to_emit = pipeline.StageQueue("emit", PIPELINE_MAX_CHUNKS, stop)
+
+    def produce():
+        # (file_info, content key, smells, is_new) per file; smells is
+        # _DUPLICATE for a copy of an earlier file
+        chunk = []
+        queue = inference.InferenceQueue()
+        by_key = {}  # content key -> metrics table
+        for file_info in infos:
+            with pipeline.busy("produce"):
+                if stop.is_set():
+                    return
+                with PHASE_SECONDS.time(phase="unzip"):
+                    with zip_ref.open(file_info) as java_file:
+                        data = java_file.read()
+
+                key = content_hash(data)
+                if key in by_key:
+                    RESULT_CACHE_LOOKUPS.inc(result="duplicate")
+                    if tables is not None:
+                        tables[file_info.filename] = by_key[key]
+                    chunk.append((file_info, key, _DUPLICATE, False))
+                    continue
+
+                smells, table = _lookup(cache, metrics_cache, key)
+                is_new = smells is MISS
+                if is_new:
+                    RESULT_CACHE_LOOKUPS.inc(result="miss")
+                    smells, table = _analyze(data, file_info.filename, metrics_cache, key, queue)
+                else:
+                    RESULT_CACHE_LOOKUPS.inc(result="hit")
+                    smells = _relocate(smells, file_info.filename)
+                by_key[key] = table
+                if tables is not None:
+                    tables[file_info.filename] = table
+                chunk.append((file_info, key, smells, is_new))
+
+            if len(queue) >= INFERENCE_FLUSH_SAMPLES:
+                to_infer.put((chunk, queue), "produce")
+                chunk = []
+                queue = inference.InferenceQueue()
+        if chunk:
+            to_infer.put((chunk, queue), "produce")
+        to_infer.put(pipeline.DONE, "produce")
+
+    def infer():
+        while True:
+            item = to_infer.get("infer")
+            if item is pipeline.DONE or isinstance(item, pipeline.Failure):
+                to_emit.put(item, "infer")
+                return
+            chunk, queue = item
+            if len(queue):
+                with pipeline.busy("infer"), PHASE_SECONDS.time(phase="inference"):
+                    queue.flush()
+            to_emit.put(chunk, "infer")
+
+    threads = [
+        pipeline.start_stage("produce", produce, to_infer),
+        pipeline.start_stage("infer", infer, to_emit),
+    ]
+    seen = {}
+    try:
+        while True:
+            chunk = to_emit.get("emit")
+            if chunk is pipeline.DONE:
+                break
+            if isinstance(chunk, pipeline.Failure):
+                raise chunk.error
+            with pipeline.busy("emit"):
+                resolved = []
+                for file_info, key, smells, is_new in chunk:
+                    if smells is _DUPLICATE:
+                        resolved.append(_relocate(seen[key], file_info.filename))
+                        continue
+                    smells = inference.resolve(smells)
+                    if is_new:
+                        cache.put(key, smells)
+                    seen[key] = smells
+                    resolved.append(smells)
+            yield from resolved
+    finally:
+        # Also reached when the caller stops early; the stages notice and exit
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def _iter_group_serial(zip_ref, infos, cache, metrics_cache=None, tables=None):
+    """iter_group without models: every file's result is final once analyzed"""
+    seen = {}
+    by_key = {}
+    for file_info in infos:
+        with PHASE_SECONDS.time(phase="unzip"):
+            with zip_ref.open(file_info) as java_file:
+                data = java_file.read()
+
+        key = content_hash(data)
+        if key in seen:
+            RESULT_CACHE_LOOKUPS.inc(result="duplicate")
+            if tables is not None:
+                tables[file_info.filename] = by_key[key]
+            yield _relocate(seen[key], file_info.filename)
+            continue
+
+        smells, table = _lookup(cache, metrics_cache, key)
+        if smells is MISS:
+            RESULT_CACHE_LOOKUPS.inc(result="miss")
+            smells, table = _analyze(data, file_info.filename, metrics_cache, key)
+            cache.put(key, smells)
+        else:
+            RESULT_CACHE_LOOKUPS.inc(result="hit")
+            smells = _relocate(smells, file_info.filename)
+        seen[key] = smells
+        by_key[key] = table
+        if tables is not None:
+            tables[file_info.filename] = table
+        yield smells
+
+
+def analyze_group(zip_ref, infos, tables=None):
+    """Smells of each zip entry, in order (see iter_group)"""
+    return list(iter_group(zip_ref, infos, tables))
+
+
+# =============================================================================
+# PARALLEL ANALYSIS
+# =============================================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Worker-side cache of the open archive, so a worker opens each upload once
+# rather than once per file
+_worker_archive = None
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(ANALYSIS_START_METHOD)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=warm_up_models if PRELOAD_MODELS else None,
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _open_worker_archive(archive_path):
+    global _worker_archive
+    stat = os.stat(archive_path)
+    key = (archive_path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if _worker_archive is None or _worker_archive[0] != key:
+        if _worker_archive is not None:
+            _worker_archive[1].close()
+        _worker_archive = (key, zipfile.ZipFile(archive_path, 'r'))
+    return _worker_archive[1]
+
+
+def _analyze_members(archive_path, member_names, with_metrics=False):
+    """
+    Process pool task: open the archive in the worker and analyze a group
+    of entries. Returns the results, the worker's metrics delta and, with
+    with_metrics, the entries' metrics tables (else None).
+    """
+    zip_ref = _open_worker_archive(archive_path)
+    tables = {} if with_metrics else None
+    results = analyze_group(zip_ref, [zip_ref.getinfo(name) for name in member_names], tables)
+    return results, metrics.REGISTRY.collect_delta(), tables
+
+
+def _iter_parallel(archive_path, entries, workers, tables=None):
+    """
+    Yield (entry indices, smells of each) per group as worker tasks finish;
+    with a tables dict, the group's metrics tables are added to it first.
+    """
+    pool = _get_pool(workers)
+
+    # Entries that are likely identical (same CRC and size) go to the same
+    # worker, which analyzes the content once
+    groups = {}
+    for index, file_info in enumerate(entries):
+        groups.setdefault((file_info.CRC, file_info.file_size), []).append(index)
+
+    # Largest files first so a single huge file doesn't finish last
+    schedule = sorted(groups.values(), key=lambda group: entries[group[0]].file_size, reverse=True)
+    futures = {
+        pool.submit(_analyze_members, archive_path, [entries[i].filename for i in group], tables is not None): group
+        for group in schedule
+    }
+
+    try:
+        for future in as_completed(futures):
+            group_results, metrics_delta, group_tables = future.result()
+            metrics.REGISTRY.merge(metrics_delta)
+            if tables is not None:
+                tables.update(group_tables)
+            yield futures[future], group_results
+    finally:
+        # The consumer stopped early (e.g. a streaming client went away)
+        for future in futures:
+            future.cancel()
+
+
+@contextmanager
+def _archive_on_disk(zip_data):
+    """Yield a filesystem path for the archive, spilling in-memory data to a temp file"""
+    if isinstance(zip_data, (str, os.PathLike)):
+        yield os.fspath(zip_data)
+        return
+
+    name = getattr(zip_data, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        zip_data.flush()
+        yield name
+        return
+
+    position = zip_data.tell()
+    zip_data.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.zip') as spill:
+        shutil.copyfileobj(zip_data, spill)
+        spill.flush()
+        zip_data.seek(position)
+        yield spill.name
+
+
+def iter_traverse_zip(zip_data, workers=None, progress=None, tables=None):
+    """
+    Analyze every Java source in a zip archive, yielding results as files
+    finish rather than holding them all in memory.
+
+    Args:
+        zip_data: Path or binary file object of the archive
+        workers: Worker processes to use; defaults to ANALYSIS_WORKERS.
+                 0 or 1 analyzes serially.
+        progress: Optional callback(files_done, files_total), called once
+                  before analysis starts and as files finish
+        tables: Optional dict; the metrics table of each file is stored in
+                it by filepath before the file is yielded (None for files
+                that were skipped or failed to parse)
+
+    Yields:
+        (index, filepath, smells) for every analyzed file, including files
+        without smells. Serial runs yield in archive order; parallel runs
+        yield in completion order, index being the file's position among
+        the analyzed entries.
+    """
+    if workers is None:
+        workers = ANALYSIS_WORKERS
 
-def traverse_zip(zip_data):
-    detected_smells = {}
     with zipfile.ZipFile(zip_data, 'r') as zip_ref:
-        for file_info in zip_ref.infolist():
-            # Skip if the file is in a 'test' directory
-            if 'test/' in file_info.filename.lower():
-                continue
-            if file_info.filename.endswith('.java'):
-                with zip_ref.open(file_info) as java_file:
-                    try:
-                        content = java_file.read().decode('utf-8')
-                        
-                        # Skip JavaFX files
-                        if is_javafx_code(content):
-                            continue
-                        
-                        smells = analyze_code(content, file_info.filename)
-                        if smells:
-                            detected_smells[file_info.filename] = smells
-                    except UnicodeDecodeError:
-                        continue  # Skip files that can't be decoded
-    return detected_smells
+        files = [info for info in zip_ref.infolist() if not info.is_dir()]
+        entries = [info for info in files if is_java_source(info)]
+        FILES_SKIPPED.inc(len(files) - len(entries), reason="excluded")
+
+        done = set()
+        if progress:
+            progress(0, len(entries))
+
+        if workers > 1 and len(entries) > 1:
+            try:
+                with _archive_on_disk(zip_data) as archive_path:
+                    for group, group_results in _iter_parallel(archive_path, entries, workers, tables):
+                        for index, smells in zip(group, group_results):
+                            done.add(index)
+                            yield index, entries[index].filename, smells
+                        if progress:
+                            progress(len(done), len(entries))
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning("Parallel analysis failed (%s), falling back to serial", e)
+                _reset_pool()
+
+        # Serial run, or whatever the pool did not finish
+        remaining = [index for index in range(len(entries)) if index not in done]
+        results = iter_group(zip_ref, [entries[index] for index in remaining], tables)
+        for index, smells in zip(remaining, results):
+            done.add(index)
+            yield index, entries[index].filename, smells
+            if progress:
+                progress(len(done), len(entries))
+
+
+def traverse_zip(zip_data, workers=None, progress=None, tables=None):
+    """
+    Analyze every Java source in a zip archive.
+
+    Args:
+        zip_data: Path or binary file object of the archive
+        workers: Worker processes to use; defaults to ANALYSIS_WORKERS.
+                 0 or 1 analyzes serially.
+        progress: Optional callback(files_done, files_total), called once
+                  before analysis starts and as files finish
+        tables: Optional dict to fill with each file's metrics table (see
+                iter_traverse_zip)
+
+    Returns:
+        Dict of filepath -> smells, in archive order
+    """
+    results = {}
+    for index, filepath, smells in iter_traverse_zip(zip_data, workers, progress, tables):
+        if smells:
+            results[index] = (filepath, smells)
+    return dict(results[index] for index in sorted(results))
+
+
+# =============================================================================
+# WARM-UP AND READINESS
+# =============================================================================
+
+_warm_up = {
+    "status": "pending" if SEMANTIC_DETECTORS and PRELOAD_MODELS else "skipped",
+    "seconds": None,
+    "error": None,
+    "workersWarm": 0,
+}
+_warm_up_lock = threading.Lock()
+
+
+def _warm_up_worker(_):
+    """Process pool task: warm this worker's models (once) and report them"""
+    return warm_up_models()
+
+
+def warm_up(workers=None):
+    """
+    Startup warm-up of the processes that will run analyses: this one for
+    serial analysis, otherwise every pool worker (the pool is started here).
+    Progress and failures are reported by readiness().
+    """
+    if workers is None:
+        workers = ANALYSIS_WORKERS
+    _warm_up.update(status="running", error=None)
+    start = time.perf_counter()
+    try:
+        if workers > 1:
+            pool = _get_pool(workers)
+            for index, _ in enumerate(pool.map(_warm_up_worker, range(workers)), 1):
+                _warm_up["workersWarm"] = index
+        else:
+            warm_up_models()
+    except Exception as e:
+        logger.exception("Model warm-up failed")
+        _warm_up.update(status="failed", error=str(e))
+    else:
+        _warm_up["status"] = "done"
+    _warm_up["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info("Model warm-up %s in %.2fs", _warm_up["status"], _warm_up["seconds"])
+
+
+def start_warm_up(workers=None):
+    """Run warm_up() on a background thread, once (not at all with PRELOAD_MODELS off)"""
+    with _warm_up_lock:
+        if _warm_up["status"] != "pending":
+            return False
+        _warm_up["status"] = "running"
+    threading.Thread(target=warm_up, args=(workers,), name="model-warmup", daemon=True).start()
+    return True
+
+
+def readiness():
+    """
+    Whether this process can serve analyses at full speed: warm-up state,
+    the models loaded here, the inference queues and the worker pool.
+    """
+    state = {
+        "warmUp": dict(_warm_up),
+        "models": {},
+        "inferenceQueues": {},
+        "analysisWorkers": {
+            "configured": ANALYSIS_WORKERS,
+            "poolStarted": _pool is not None,
+        },
+    }
+    if SEMANTIC_DETECTORS:
+        from detectors.semantics import coalescer, models
+        state["models"] = models.status()
+        state["inferenceQueues"] = coalescer.status()
+    state["ready"] = (
+        state["warmUp"]["status"] in ("done", "skipped")
+        and all(queue["alive"] for queue in state["inferenceQueues"].values())
+    )
+    return state
@@ -0,0 +1,157 @@
+"""
+Complex Method Cascade Calibration
+
+Trains the metric-based cascade (detectors/semantics/cascade.py) on a
+labeled set of methods and picks the cutoff that keeps the requested
+recall of Complex Method detections on a held-out calibration split.
+Methods scoring below the cutoff skip the transformer at analysis time.
+
+Labels come either from a JSONL file ({"code": "<method source>",
+"label": 0 or 1} per line) or from running the Complex Method model over
+a project (--project), which measures recall against the transformer
+itself.
+
+Usage:
+    python tools/calibrate_cascade.py --labels methods.jsonl [--recall 0.99] [--output FILE]
+    python tools/calibrate_cascade.py --project project.zip [--save-labels methods.jsonl]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import zipfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# The model must label every method, so the cascade being calibrated is not loaded
+os.environ["COMPLEX_METHOD_CASCADE_PATH"] = "off"
+
+import javalang  # noqa: E402
+
+from detectors.context import FileContext  # noqa: E402
+from detectors.semantics.cascade import FEATURES, Cascade, method_features, snippet_method, transform  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "complex-method-cascade.json")
+
+
+def read_labels(path):
+    """(features, label, code) per parsable method of a JSONL file"""
+    rows = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            method = snippet_method(item["code"])
+            if method is None:
+                continue
+            rows.append((method_features(method, item["code"]), int(item["label"]), item["code"]))
+    return rows
+
+
+def project_sources(path):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zip_ref:
+            return [(name, zip_ref.read(name).decode("utf-8", errors="ignore"))
+                    for name in zip_ref.namelist() if name.endswith(".java") and "test/" not in name]
+    sources = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".java"):
+                with open(os.path.join(root, name), encoding="utf-8", errors="ignore") as handle:
+                    sources.append((os.path.join(root, name), handle.read()))
+    return sources
+
+
+def label_project(path):
+    """(features, label, code) per method, labeled by the Complex Method model"""
+    from detectors.semantics import complex_method
+
+    methods = []
+    for filepath, content in project_sources(path):
+        try:
+            context = FileContext(content, filepath)
+        except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+            continue
+        for _, method in context.tree.filter(javalang.tree.MethodDeclaration):
+            if method.position and method.name != "main":
+                start_line = method.position.line
+                code = complex_method.extract_method_code(
+                    context.source_lines, start_line, context.spans.end_line(method))
+                methods.append((method_features(method, code), code))
+
+    labels = complex_method.detect_complex_method_batch([code for _, code in methods])
+    return [(features, int(label), code) for (features, code), label in zip(methods, labels)]
+
+
+def choose_cutoff(scores, labels, target_recall):
+    """Highest cutoff that still keeps target_recall of the positive methods"""
+    positives = sorted(score for score, label in zip(scores, labels) if label)
+    if not positives:
+        raise SystemExit("The calibration split has no Complex Method examples")
+    allowed_misses = int((1.0 - target_recall) * len(positives))
+    return positives[allowed_misses]
+
+
+def evaluate(cascade, rows):
+    skipped = [cascade.skips(features) for features, _, _ in rows]
+    positives = sum(1 for _, label, _ in rows if label)
+    kept = sum(1 for (_, label, _), skip in zip(rows, skipped) if label and not skip)
+    return {
+        "methods": len(rows),
+        "positives": positives,
+        "recall": kept / positives if positives else 1.0,
+        "skip_rate": sum(skipped) / len(rows) if rows else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--labels", help="JSONL of {code, label}")
+    source.add_argument("--project", help="Project zip or directory labeled with the Complex Method model")
+    parser.add_argument("--save-labels", help="Write the labeled methods to this JSONL file")
+    parser.add_argument("--recall", type=float, default=0.99, help="Recall to keep on the calibration split")
+    parser.add_argument("--calibration-split", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    from sklearn.linear_model import LogisticRegression
+
+    rows = read_labels(args.labels) if args.labels else label_project(args.project)
+    if args.save_labels:
+        with open(args.save_labels, "w", encoding="utf-8") as handle:
+            for _, label, code in rows:
+                handle.write(json.dumps({"code": code, "label": label}) + "\n")
+
+    random.Random(args.seed).shuffle(rows)
+    split = int(len(rows) * (1.0 - args.calibration_split))
+    train, calibration = rows[:split], rows[split:]
+    if len({label for _, label, _ in train}) < 2:
+        raise SystemExit("The training split needs both clean and complex methods")
+
+    classifier = LogisticRegression(class_weight="balanced", max_iter=1000)
+    classifier.fit([transform(features) for features, _, _ in train], [label for _, label, _ in train])
+
+    cascade = Cascade(classifier.coef_[0].tolist(), float(classifier.intercept_[0]), cutoff=0.0)
+    scores = [cascade.score(features) for features, _, _ in calibration]
+    cascade.cutoff = choose_cutoff(scores, [label for _, label, _ in calibration], args.recall)
+
+    report = evaluate(cascade, calibration)
+    cascade.info = {"target_recall": args.recall, "calibration": report}
+    cascade.save(args.output)
+
+    print(f"features:  {', '.join(FEATURES)}")
+    print(f"methods:   {len(train)} train, {len(calibration)} calibration ({report['positives']} complex)")
+    print(f"cutoff:    {cascade.cutoff:.6f}")
+    print(f"recall:    {report['recall']:.4f} (target {args.recall})")
+    print(f"skip rate: {report['skip_rate']:.2%} of methods skip the transformer")
+    print(f"written:   {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Student Model Distillation
+
+Distills the Complex Method or Feature Envy classifier into a smaller
+student for the "student" model tier (MODEL_TIER=student). The current
+model is the teacher: it labels an unlabeled corpus of Java projects,
+with snippets built exactly as the detectors build them
+(extract_method_code for Complex Method, the FeatureEnvyPreprocessor
+minimal samples for Feature Envy), and the student is trained on its
+softened logits.
+
+The student keeps the teacher's architecture, tokenizer and hidden size
+with fewer encoder layers, initialized from evenly spaced teacher layers.
+It is written next to the teacher as "<model directory>-student" together
+with distillation.json, which records agreement with the teacher on a
+held-out split and the CPU speedup.
+
+Everything runs offline on CPU.
+
+Usage:
+    python tools/distill_student.py --model complex_method --corpus projects/ [--corpus more.zip]
+                                    [--layers 4] [--epochs 3] [--save-labels labels.jsonl]
+    python tools/distill_student.py --model feature_envy --labels labels.jsonl
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import re
+import sys
+import time
+import zipfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# The teacher is the full fp32 model, run on the calling thread on CPU,
+# without network access
+os.environ["MODEL_TIER"] = "full"
+os.environ["INFERENCE_BACKEND"] = "pytorch"
+os.environ["INFERENCE_COALESCE"] = "0"
+os.environ["CUDA_VISIBLE_DEVICES"] = ""
+os.environ["HF_HUB_OFFLINE"] = "1"
+os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+import javalang  # noqa: E402
+
+from detectors.context import FileContext  # noqa: E402
+from detectors.semantics import complex_method, feature_envy, inference, models  # noqa: E402
+from detectors.semantics.feature_envy_preprocessor import preprocess_java_file  # noqa: E402
+
+DETECTORS = {
+    "complex_method": complex_method,
+    "feature_envy": feature_envy,
+}
+
+# Matches the index in encoder layer parameter names ("...layer.7.attention...")
+LAYER_KEY = re.compile(r"^(.*\.layer\.)(\d+)(\..*)$")
+
+
+def corpus_sources(path):
+    """(path, content) of every .java file in a zip or directory"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zip_ref:
+            for name in zip_ref.namelist():
+                if name.endswith(".java"):
+                    yield name, zip_ref.read(name).decode("utf-8", errors="ignore")
+        return
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".java"):
+                full_path = os.path.join(root, name)
+                with open(full_path, encoding="utf-8", errors="ignore") as handle:
+                    yield full_path, handle.read()
+            elif name.endswith(".zip"):
+                yield from corpus_sources(os.path.join(root, name))
+
+
+def extract_snippets(name, paths):
+    """Distinct normalized snippets of the corpus, as the detector builds them"""
+    snippets = {}
+    for path in paths:
+        for filepath, content in corpus_sources(path):
+            try:
+                context = FileContext(content, filepath)
+            except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+                continue
+            if name == "complex_method":
+                for _, method in context.tree.filter(javalang.tree.MethodDeclaration):
+                    if method.position and method.name != "main":
+                        code = complex_method.extract_method_code(
+                            context.source_lines, method.position.line, context.spans.end_line(method))
+                        snippets.setdefault(inference.normalize_text(code), None)
+            else:
+                for sample in preprocess_java_file(content, filepath, context.filename, context):
+                    if sample.get("code_sample"):
+                        snippets.setdefault(inference.normalize_text(sample["code_sample"]), None)
+    return list(snippets)
+
+
+def read_labels(path):
+    with open(path, encoding="utf-8") as handle:
+        rows = [json.loads(line) for line in handle if line.strip()]
+    return [row["text"] for row in rows], [row["logits"] for row in rows]
+
+
+def save_labels(path, texts, logits):
+    with open(path, "w", encoding="utf-8") as handle:
+        for text, row in zip(texts, logits):
+            handle.write(json.dumps({"text": text, "logits": row}) + "\n")
+
+
+def kept_layers(total, layers):
+    """Evenly spaced teacher layers, always including the last one"""
+    if layers >= total:
+        return list(range(total))
+    if layers == 1:
+        return [total - 1]
+    return [round(i * (total - 1) / (layers - 1)) for i in range(layers)]
+
+
+def build_student(teacher, layers):
+    """Teacher architecture with fewer layers, initialized from the kept teacher layers"""
+    from transformers import AutoModelForSequenceClassification
+
+    keep = kept_layers(teacher.config.num_hidden_layers, layers)
+    config = copy.deepcopy(teacher.config)
+    config.num_hidden_layers = len(keep)
+    student = AutoModelForSequenceClassification.from_config(config)
+
+    state = {}
+    for key, value in teacher.state_dict().items():
+        match = LAYER_KEY.match(key)
+        if match is None:
+            state[key] = value
+        elif int(match.group(2)) in keep:
+            state[f"{match.group(1)}{keep.index(int(match.group(2)))}{match.group(3)}"] = value
+    student.load_state_dict(state, strict=False)
+    return student, keep
+
+
+def train(student, tokenizer, texts, teacher_logits, args):
+    import torch
+    import torch.nn.functional as F
+
+    torch.manual_seed(args.seed)
+    rng = random.Random(args.seed)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.learning_rate)
+    encodings = tokenizer(texts, truncation=True, max_length=512)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    batches = inference.plan_batches(lengths, args.batch_size, args.max_batch_tokens)
+    temperature = args.temperature
+
+    for epoch in range(args.epochs):
+        student.train()
+        rng.shuffle(batches)
+        total_loss = 0.0
+        start = time.perf_counter()
+        for batch in batches:
+            features = {key: [values[i] for i in batch] for key, values in encodings.items()}
+            inputs = tokenizer.pad(features, return_tensors="pt")
+            target = torch.tensor([teacher_logits[i] for i in batch], dtype=torch.float)
+
+            logits = student(**inputs).logits
+            # Soft targets carry the teacher's confidence; the hard labels
+            # keep the student anchored to its decisions
+            soft = F.kl_div(F.log_softmax(logits / temperature, dim=-1),
+                            F.softmax(target / temperature, dim=-1),
+                            reduction="batchmean") * temperature ** 2
+            hard = F.cross_entropy(logits, target.argmax(dim=-1))
+            loss = args.alpha * soft + (1.0 - args.alpha) * hard
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        print(f"epoch {epoch + 1}/{args.epochs}: loss {total_loss / len(texts):.4f} "
+              f"({time.perf_counter() - start:.1f}s)")
+    student.eval()
+
+
+def timed_labels(name, tokenizer, model, texts, args):
+    import torch
+
+    start = time.perf_counter()
+    labels, _ = inference.classify(
+        name, tokenizer, model, torch.device("cpu"), texts, args.batch_size, args.max_batch_tokens)
+    return labels, time.perf_counter() - start
+
+
+def parameter_count(model):
+    return sum(parameter.numel() for parameter in model.parameters())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=sorted(DETECTORS), required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", action="append", help="Project zip or directory (repeatable)")
+    source.add_argument("--labels", help="Teacher labels saved earlier with --save-labels")
+    parser.add_argument("--save-labels", help="Write the teacher's logits to this JSONL file")
+    parser.add_argument("--layers", type=int, default=4, help="Encoder layers of the student")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-batch-tokens", type=int, default=8192)
+    parser.add_argument("--learning-rate", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="Weight of the soft (teacher logit) loss")
+    parser.add_argument("--eval-split", type=float, default=0.1)
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = torch default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Student directory (default: <model directory>-student)")
+    args = parser.parse_args()
+
+    import torch
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    detector = DETECTORS[args.model]
+    teacher = models.get(args.model)
+    tokenizer = teacher.tokenizer
+    output = args.output or models.student_path(detector.model_path)
+
+    if args.labels:
+        texts, teacher_logits = read_labels(args.labels)
+    else:
+        texts = extract_snippets(args.model, args.corpus)
+        print(f"labeling {len(texts)} snippets with the teacher")
+        _, teacher_logits = inference.classify(
+            args.model, tokenizer, teacher.model, teacher.device, texts, args.batch_size, args.max_batch_tokens)
+        if args.save_labels:
+            save_labels(args.save_labels, texts, teacher_logits)
+    if len(texts) < 2:
+        raise SystemExit("The corpus has too few snippets to distill from")
+
+    order = list(range(len(texts)))
+    random.Random(args.seed).shuffle(order)
+    split = max(1, int(len(order) * args.eval_split))
+    evaluation, training = order[:split], order[split:]
+
+    student, keep = build_student(teacher.model, args.layers)
+    print(f"student: {len(keep)} of {teacher.model.config.num_hidden_layers} layers {keep}, "
+          f"{parameter_count(student) / 1e6:.1f}M vs {parameter_count(teacher.model) / 1e6:.1f}M parameters")
+    train(student, tokenizer, [texts[i] for i in training], [teacher_logits[i] for i in training], args)
+
+    eval_texts = [texts[i] for i in evaluation]
+    teacher_labels = [max(range(len(teacher_logits[i])), key=teacher_logits[i].__getitem__) for i in evaluation]
+    _, teacher_seconds = timed_labels(args.model, tokenizer, teacher.model, eval_texts, args)
+    student_labels, student_seconds = timed_labels(args.model, tokenizer, student, eval_texts, args)
+
+    agree = sum(1 for a, b in zip(teacher_labels, student_labels) if a == b)
+    report = {
+        "model": args.model,
+        "teacher": os.path.relpath(detector.model_path, PROJECT_ROOT),
+        "teacher_model_id": teacher.spec.model_id,
+        "teacher_layers_kept": keep,
+        "teacher_parameters": parameter_count(teacher.model),
+        "student_parameters": parameter_count(student),
+        "train_snippets": len(training),
+        "eval_snippets": len(evaluation),
+        "agreement": agree / len(evaluation),
+        "gained": sum(1 for a, b in zip(teacher_labels, student_labels) if a == 0 and b == 1),
+        "lost": sum(1 for a, b in zip(teacher_labels, student_labels) if a == 1 and b == 0),
+        "teacher_ms_per_snippet": teacher_seconds / len(evaluation) * 1000,
+        "student_ms_per_snippet": student_seconds / len(evaluation) * 1000,
+        "cpu_speedup": teacher_seconds / student_seconds if student_seconds else None,
+        "cpu_threads": torch.get_num_threads(),
+        "epochs": args.epochs,
+        "temperature": args.temperature,
+        "alpha": args.alpha,
+        "seed": args.seed,
+    }
+
+    os.makedirs(output, exist_ok=True)
+    student.save_pretrained(output)
+    with open(os.path.join(output, "distillation.json"), "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+        handle.write("\n")
+
+    print(f"agreement: {report['agreement']:.2%} with the teacher on {len(evaluation)} held-out snippets "
+          f"({report['gained']} gained, {report['lost']} lost)")
+    print(f"cpu:       {report['teacher_ms_per_snippet']:.2f} -> {report['student_ms_per_snippet']:.2f} ms/snippet "
+          f"({report['cpu_speedup']:.2f}x on {report['cpu_threads']} threads)")
+    print(f"written:   {output} (select with MODEL_TIER=student)")
+
+
+if __name__ == "__main__":
+    main()